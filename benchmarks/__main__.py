@@ -0,0 +1,87 @@
+""" The benchmark suite: times the builder, the director, rendering, tag creation and template I/O over size grids,
+    stores the results as JSON and compares two result files
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks run [-o results.json] [-k PATTERN] [--quick] [--repeat N]
+    python -m benchmarks compare base.json new.json [--threshold 0.1] [--stat min|median]
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.suite import cases, iter_results, metadata  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def run(args: argparse.Namespace) -> int:
+    selected = [case for case in cases(quick=args.quick) if not args.k or args.k in case.name]
+    results, skipped = {}, {}
+    for case, result, error in iter_results(selected, repeat=args.repeat, min_time=args.min_time):
+        if result is None:
+            skipped[case.name] = error
+            print(f"{case.name:<44} {error}")
+            continue
+        results[case.name] = dict(group=case.group, **result.to_json())
+        print(f"{case.name:<44} {results[case.name]['min'] * 1000:>11.3f} ms "
+              f"(median {results[case.name]['median'] * 1000:.3f} ms, {result.loops} loops x {args.repeat})")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(dict(version=RESULTS_VERSION, meta=metadata(), results=results, skipped=skipped), output,
+                      indent=2)
+        print(f"saved to {args.output}")
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """ Exits with 1 if any benchmark present in both files got slower than "threshold" """
+    base, new = (load_results(path) for path in (args.base, args.new))
+    regressions = 0
+    print(f"{'benchmark':<44} {'base, ms':>11} {'new, ms':>11} {'change':>8}")
+    for name in sorted(base.keys() & new.keys()):
+        before, after = base[name][args.stat], new[name][args.stat]
+        change = after / before - 1
+        flag = ""
+        if change > args.threshold:
+            flag, regressions = "REGRESSION", regressions + 1
+        elif change < -args.threshold:
+            flag = "faster"
+        print(f"{name:<44} {before * 1000:>11.3f} {after * 1000:>11.3f} {change:>+8.1%} {flag}")
+    for name in sorted(base.keys() ^ new.keys()):
+        print(f"{name:<44} only in {args.base if name in base else args.new}")
+    print(f"{regressions} regression(s) past {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def load_results(path: str) -> dict:
+    with open(path) as results:
+        data = json.load(results)
+    if data.get("version") != RESULTS_VERSION:
+        raise SystemExit(f"{path}: unsupported results version {data.get('version')}")
+    return data["results"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite")
+    run_parser.add_argument("-o", "--output", help="JSON file for the results")
+    run_parser.add_argument("-k", help="only the benchmarks whose name contains this substring")
+    run_parser.add_argument("--quick", action="store_true", help="smaller size grids")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="the minimal duration of a sample, s")
+    run_parser.set_defaults(handler=run)
+    compare_parser = commands.add_parser("compare", help="flag the regressions between two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown, 0.1 is 10%%")
+    compare_parser.add_argument("--stat", choices=("min", "median"), default="min")
+    compare_parser.set_defaults(handler=compare)
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
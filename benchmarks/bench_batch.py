@@ -0,0 +1,51 @@
+""" Throughput of the batch generation of the full style matrix as the number of workers grows
+
+    python -m benchmarks.bench_batch [--max-workers N]
+"""
+import argparse
+import json
+import os
+from dataclasses import asdict
+from itertools import product
+from tempfile import TemporaryDirectory
+
+from source.batch import load_manifest, run_batch
+from source.html_utils import PageSpec
+
+COLORS = ("black", "red", "green", "yellow", "blue")
+ALIGNMENTS = ("left", "center", "right")
+SIZES = ((10, 10), (50, 20), (100, 50))
+
+
+def matrix_specs() -> list[PageSpec]:
+    return [PageSpec(color=color, alignment=alignment, bordered=bordered, headers=headers, sections=sections, divs=divs)
+            for color, alignment, bordered, headers, (sections, divs)
+            in product(COLORS, ALIGNMENTS, (False, True), (False, True), SIZES)]
+
+
+def write_matrix_manifest(path: str) -> None:
+    with open(path, "w") as manifest:
+        json.dump([asdict(spec) for spec in matrix_specs()], manifest)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        manifest = os.path.join(tmp, "matrix.json")
+        write_matrix_manifest(manifest)
+        entries = load_manifest(manifest)
+        workers = 1
+        while True:
+            for ordered in (True, False):
+                report = run_batch(entries, os.path.join(tmp, "pages"), workers=workers, ordered=ordered)
+                print(f"{workers:>3} workers, {'ordered' if ordered else 'unordered':>9}: {report}")
+            if workers >= args.max_workers:
+                break
+            workers = min(workers * 2, args.max_workers)
+
+
+if __name__ == '__main__':
+    main()
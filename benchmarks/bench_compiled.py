@@ -0,0 +1,49 @@
+""" Tree builder against the compiled page renderer on pages from 1 000 to 1 000 000 divs
+
+    python -m benchmarks.bench_compiled [--max-divs N]
+"""
+import argparse
+from time import perf_counter
+from typing import Callable
+
+from source.generate import generate_page
+from source.html_compiler import PageCompiler
+from source.html_utils import PageSpec
+
+DIVS_PER_SECTION = 100
+
+
+def timed(action: Callable[[], str]) -> tuple[float, str]:
+    start = perf_counter()
+    html = action()
+    return perf_counter() - start, html
+
+
+def bench(spec: PageSpec) -> str:
+    compiler = PageCompiler()  # an empty cache for the cold run
+    tree, tree_html = timed(lambda: generate_page(spec, compiled=False))
+    cold, cold_html = timed(lambda: compiler.get_html(spec))
+    warm, warm_html = timed(lambda: compiler.get_html(spec))
+    assert tree_html == cold_html == warm_html, spec
+    return f"{tree:>9.4f} {cold:>9.4f} {warm:>9.4f} {tree / cold:>9.1f}x {tree / warm:>9.1f}x"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-divs", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'sections x divs':>18} {'tree, s':>9} {'cold, s':>9} {'warm, s':>9} {'cold':>10} {'warm':>10}")
+    total_divs = 1000
+    while total_divs <= args.max_divs:
+        shapes = [(total_divs // DIVS_PER_SECTION, DIVS_PER_SECTION)]
+        if total_divs <= 100_000:
+            shapes.append((1, total_divs))  # a single wide section
+        for sections, divs in shapes:
+            spec = PageSpec(sections=sections, divs=divs, bordered=True, headers=True, color="blue")
+            print(f"{f'{sections} x {divs}':>18} {bench(spec)}")
+        total_divs *= 10
+
+
+if __name__ == '__main__':
+    main()
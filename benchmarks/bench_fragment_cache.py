@@ -0,0 +1,45 @@
+""" Cold against warm generation of the full style matrix through the section fragment cache
+
+    python -m benchmarks.bench_fragment_cache [--max-bytes N]
+"""
+import argparse
+from time import perf_counter
+
+from benchmarks.bench_batch import matrix_specs
+from source.generate import generate_page
+from source.html_cache import DEFAULT_CACHE_BYTES, FragmentCache
+from source.html_document import HtmlDocument
+from source.html_utils import PageSpec
+
+
+def generate_all(specs: list[PageSpec], cache: FragmentCache) -> float:
+    start = perf_counter()
+    for spec in specs:
+        document = HtmlDocument(cache)
+        document.update(spec)
+        document.get_html()
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_CACHE_BYTES)
+    args = parser.parse_args()
+
+    specs = matrix_specs()
+    start = perf_counter()
+    for spec in specs:
+        generate_page(spec, compiled=False)
+    print(f"{'tree builder':>12}: {perf_counter() - start:.3f} s for {len(specs)} pages")
+    cache = FragmentCache(args.max_bytes)
+    for name in ("cold cache", "warm cache"):
+        elapsed = generate_all(specs, cache)
+        print(f"{name:>12}: {elapsed:.3f} s, {cache.stats}")
+    for spec in specs[::17]:
+        document = HtmlDocument(cache)
+        document.update(spec)
+        assert document.get_html() == generate_page(spec, compiled=False), f"cached page differs for {spec}"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" Event-loop latency of MainWindow while a 200 000-div page is generated in the worker thread
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_gui_latency [--sections N] [--divs N] [--budget-ms N]
+"""
+import argparse
+import os
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from source.app import MainWindow  # noqa: E402
+from source.html_cache import FRAGMENT_CACHE  # noqa: E402
+
+TICK_MS = 5
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=2_000)
+    parser.add_argument("--divs", type=int, default=100)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    window.sections_spin.setMaximum(args.sections)
+    window.sections_spin.setValue(args.sections)
+    window.divs_spin.setMaximum(args.divs)
+    window.divs_spin.setValue(args.divs)
+    window.headers_check.setChecked(True)
+    FRAGMENT_CACHE.clear()
+
+    ticks: list[float] = []
+    marks: dict[str, float] = dict()
+    timer = QTimer()
+    timer.setInterval(TICK_MS)
+    timer.timeout.connect(lambda: ticks.append(perf_counter()))
+    window.temp_progress.connect(lambda percent: percent == 100 and marks.setdefault("built", perf_counter()))
+    loop = QEventLoop()
+    window.temp_generated.connect(loop.quit)
+
+    timer.start()
+    marks["start"] = perf_counter()
+    window.generate()
+    loop.exec()
+    marks["shown"] = perf_counter()
+    timer.stop()
+
+    during_build = [tick for tick in ticks if tick <= marks["built"]]
+    gaps = [(later - earlier) * 1000 - TICK_MS for earlier, later in zip(during_build, during_build[1:])]
+    worst = max(gaps, default=0.0)
+    print(f"{args.sections * args.divs} divs built in {(marks['built'] - marks['start']) * 1000:.0f} ms, "
+          f"text shown after {(marks['shown'] - marks['built']) * 1000:.0f} ms more")
+    print(f"event-loop latency while building: max {worst:.1f} ms over {len(gaps)} ticks "
+          f"({'within' if worst < args.budget_ms else 'over'} the {args.budget_ms:.0f} ms budget)")
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+""" Regeneration latency of a 10 000-section page after a one-section or a style change
+
+    python -m benchmarks.bench_incremental [--sections N] [--divs N]
+"""
+import argparse
+from dataclasses import replace
+from time import perf_counter
+
+from source.generate import generate_page
+from source.html_document import HtmlDocument
+from source.html_utils import PageSpec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=10_000)
+    parser.add_argument("--divs", type=int, default=6)
+    args = parser.parse_args()
+
+    spec = PageSpec(sections=args.sections, divs=args.divs, headers=True)
+    start = perf_counter()
+    generate_page(spec, compiled=False)
+    print(f"{'full rebuild':>24}: {(perf_counter() - start) * 1000:9.2f} ms")
+
+    document = HtmlDocument()
+    changes = (("first update", spec),
+               ("one section more", replace(spec, sections=spec.sections + 1)),
+               ("one section less", spec),
+               ("toggle bordered", replace(spec, bordered=True)),
+               ("change color", replace(spec, bordered=True, color="red")))
+    for name, new_spec in changes:
+        start = perf_counter()
+        changed = document.update(new_spec)
+        elapsed = perf_counter() - start
+        print(f"{name:>24}: {elapsed * 1000:9.2f} ms, {changed} fragments re-rendered")
+    assert document.get_html() == generate_page(changes[-1][1], compiled=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+""" Memory taken by the nested lists tree and by the CompactTree of the same page, measured with tracemalloc
+
+    python -m benchmarks.bench_memory [--divs N]
+"""
+import argparse
+import tracemalloc
+from time import perf_counter
+
+from source.html_utils import HtmlAdapter, Style
+
+DIVS_PER_SECTION = 100
+
+
+def measure(total_divs: int, *, compact: bool) -> tuple[int, float, str]:
+    tracemalloc.start()
+    start = perf_counter()
+    adapter = HtmlAdapter(compact=compact)
+    adapter.director.build_tree(sections_num=total_divs // DIVS_PER_SECTION, divs_num=DIVS_PER_SECTION, headers=True,
+                                div_style=Style("container", ".container {}"))
+    elapsed = perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, adapter.get_html()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--divs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    list_size, list_time, list_html = measure(args.divs, compact=False)
+    compact_size, compact_time, compact_html = measure(args.divs, compact=True)
+    assert list_html == compact_html, "the trees must render the same document"
+    print(f"{'tree':>8} {'memory, MB':>11} {'bytes/div':>10} {'build, s':>9}")
+    for name, size, elapsed in (("lists", list_size, list_time), ("compact", compact_size, compact_time)):
+        print(f"{name:>8} {size / 2 ** 20:>11.1f} {size / args.divs:>10.0f} {elapsed:>9.3f}")
+    print(f"compact tree is {list_size / compact_size:.1f}x smaller")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+""" Size and throughput of the output modes and compressions on the bundled templates and on 100k-div pages
+
+    python -m benchmarks.bench_output [--divs N] [--repeat N]
+"""
+import argparse
+import glob
+import os
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+
+from source.generate import iter_page
+from source.html_compress import COMPRESSIONS, compress_chunks
+from source.html_parser import HtmlParser
+from source.html_render import HtmlRenderer, OUTPUT_MODES, OutputMode
+from source.html_utils import HtmlDirector, PageSpec
+
+TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.html")
+
+
+def measure(chunks: Callable[[], Iterator[str]], compression: Optional[str], repeat: int) -> tuple[int, float]:
+    """ The size of the output in bytes and the best time of producing it """
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        start = perf_counter()
+        if compression is None:
+            size = sum(len(chunk.encode()) for chunk in chunks())
+        else:
+            size = sum(map(len, compress_chunks(chunks(), compression)))
+        best = min(best, perf_counter() - start)
+    return size, best
+
+
+def report(title: str, chunks_of: Callable[[OutputMode], Callable[[], Iterator[str]]], repeat: int) -> None:
+    print(title)
+    pretty_size = None
+    for mode in OUTPUT_MODES.values():
+        for compression in (None, *COMPRESSIONS):
+            size, seconds = measure(chunks_of(mode), compression, repeat)
+            pretty_size = pretty_size or size
+            print(f"{mode.name:>10} {compression or '-':>8} {size:>12} bytes {size / pretty_size:>7.1%} "
+                  f"{seconds * 1000:>9.2f} ms {pretty_size / 2 ** 20 / seconds:>8.1f} MB/s of pretty html")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--divs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for path in sorted(glob.glob(TEMPLATES)):
+        builder = HtmlParser().parse_file(path)
+        report(os.path.basename(path),
+               lambda mode: lambda: HtmlDirector(builder, HtmlRenderer(mode=mode)).iter_html(), args.repeat)
+    spec = PageSpec(sections=args.divs // 100, divs=100, bordered=True, headers=True, color="blue")
+    report(f"generated page, {spec.sections} x {spec.divs} divs, compiled",
+           lambda mode: lambda: iter_page(spec, mode=mode), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+""" Round trips of the templates through HtmlParser and its throughput on the bundled templates scaled up
+
+    python -m benchmarks.bench_parser [--megabytes N] [--repeat N]
+
+Every parsed page must be rendered back byte-identically, a mismatch fails the run. The hand-written markup
+is covered by tests/test_html_parser.py. The timings include the pass of the cyclic collector over the new tree,
+which runs as soon as the collector is resumed
+"""
+import argparse
+import glob
+import os
+import re
+from time import perf_counter
+
+from benchmarks.bench_batch import matrix_specs
+from source.generate import generate_page
+from source.html_parser import HtmlParser
+from source.html_utils import HtmlDirector, HtmlBuilder
+
+TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "*.html")
+TARGET_MB_S = 50  # of the line tokenizer into the list tree
+SECTION = re.compile(r"^( *)<section>\n.*?^\1</section>\n", re.MULTILINE | re.DOTALL)
+
+
+def render(builder: HtmlBuilder) -> str:
+    return HtmlDirector(builder).get_html()
+
+
+def minify(text: str) -> str:
+    return "".join(line.strip() for line in text.splitlines())
+
+
+def check_round_trips(templates: list[str]) -> int:
+    checked = 0
+    for compact in (False, True):
+        parser = HtmlParser(compact=compact)
+        for path in templates:
+            with open(path, "r") as template:
+                text = template.read()
+            assert render(parser.parse(text)) == text, path
+            assert render(parser.parse_file(path)) == text, path
+            assert render(parser.parse_markup((text,))) == text, path
+            assert render(parser.parse(minify(text))) == text, path  # through the html.parser fallback
+            checked += 4
+        for spec in matrix_specs():
+            text = generate_page(spec)
+            assert render(parser.parse(text)) == text, spec
+            checked += 1
+    return checked
+
+
+def scale(text: str, megabytes: int) -> str:
+    """ Repeats the sections of the template up to the size, the rest of the page stays as it is """
+    sections = [match.group() for match in SECTION.finditer(text)]
+    start, end = text.index(sections[0]), text.rindex(sections[-1]) + len(sections[-1])
+    body = "".join(sections)
+    return text[:start] + body * max(1, megabytes * 2 ** 20 // len(body)) + text[end:]
+
+
+def best_time(repeat: int, action, *args) -> tuple[float, object]:
+    """ The best of the runs, the tree of the previous run is freed before the next one """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        result = None
+        start = perf_counter()
+        result = action(*args)
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    templates = sorted(glob.glob(TEMPLATES))
+    print(f"round trips: {check_round_trips(templates)} byte-identical")
+
+    print(f"{'template':>40} {'MB':>5} {'lines MB/s':>11} {'compact MB/s':>13} {'html.parser MB/s':>17} "
+          f"{TARGET_MB_S} MB/s")
+    for path in templates:
+        with open(path, "r") as template:
+            text = scale(template.read(), args.megabytes)
+        megabytes = len(text.encode()) / 2 ** 20
+        speeds = []
+        for compact in (False, True):
+            seconds, builder = best_time(args.repeat, HtmlParser(compact=compact).parse, text)
+            assert render(builder) == text, path
+            del builder
+            speeds.append(megabytes / seconds)
+        sample = text[:len(text) // 20]  # html.parser is an order of magnitude slower, it gets a part of the page
+        seconds, _ = best_time(args.repeat, HtmlParser().parse_markup, (sample,))
+        speeds.append(len(sample.encode()) / 2 ** 20 / seconds)
+        lines, compact, markup = speeds
+        print(f"{os.path.basename(path):>40} {megabytes:>5.0f} {lines:>11.1f} {compact:>13.1f} {markup:>17.1f} "
+              f"{'met' if lines >= TARGET_MB_S else 'missed':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+""" First paint latency and peak memory of previewing a multi-hundred-MB page
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_preview [--divs N]
+"""
+import argparse
+import os
+import resource
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from source.generate import write_page  # noqa: E402
+from source.html_utils import PageSpec  # noqa: E402
+from source.preview import PreviewSource  # noqa: E402
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def gui_first_paint(path: str) -> None:
+    try:
+        from PySide6.QtWidgets import QApplication
+        from source.app import MainWindow
+    except ImportError as error:
+        print(f"GUI first paint: unavailable ({error})")
+        return
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.processEvents()
+    start = perf_counter()
+    window.set_preview(PreviewSource.from_file(path))
+    app.processEvents()
+    print(f"GUI first paint: {(perf_counter() - start) * 1000:.1f} ms, "
+          f"{window.text_edit.document().characterCount() / 2 ** 20:.2f} MB in the text pane, "
+          f"peak RSS {peak_rss_mb():.0f} MB")
+    window.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--divs", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "big.html")
+        with open(path, "wb") as output:
+            write_page(PageSpec(sections=args.divs // 100, divs=100, headers=True), output)
+        print(f"page: {os.path.getsize(path) / 2 ** 20:.0f} MB, peak RSS after writing {peak_rss_mb():.0f} MB")
+
+        start = perf_counter()
+        source = PreviewSource.from_file(path)
+        first_chunk = next(source.iter_chunks())
+        print(f"first chunk ({len(first_chunk) / 1024:.0f} KB): {(perf_counter() - start) * 1000:.1f} ms")
+        start = perf_counter()
+        read = sum(map(len, source.iter_chunks()))
+        print(f"whole page by chunks: {read / 2 ** 20:.0f} MB in {perf_counter() - start:.2f} s, "
+              f"peak RSS {peak_rss_mb():.0f} MB")
+        gui_first_paint(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+""" Cost of the pipeline instrumentation: the plain write_page against profile_page with and without tracemalloc
+
+    python -m benchmarks.bench_profiling [--sections N] [--divs N]
+"""
+import argparse
+import os
+from time import perf_counter
+from typing import Callable
+
+from source.generate import write_page
+from source.html_utils import PageSpec
+from source.profiling import profile_page
+
+
+def timed(action: Callable[[], object]) -> float:
+    start = perf_counter()
+    action()
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=300)
+    parser.add_argument("--divs", type=int, default=100)
+    args = parser.parse_args()
+
+    spec = PageSpec(sections=args.sections, divs=args.divs, headers=True)
+    with open(os.devnull, "w") as sink:
+        for compiled in (True, False):
+            write_page(spec, sink, compiled=compiled)  # the compiled page shape is cached by the first run
+            plain = timed(lambda: write_page(spec, sink, compiled=compiled))
+            timings = dict(plain=plain)
+            timings["profiled"] = timed(lambda: profile_page(spec, sink, compiled=compiled, trace_memory=False))
+            timings["profiled+tracemalloc"] = timed(lambda: profile_page(spec, sink, compiled=compiled))
+            print(f"{'compiled' if compiled else 'tree':>8}: " + ", ".join(
+                f"{name} {seconds * 1000:.1f} ms ({seconds / plain:.2f}x)" for name, seconds in timings.items()))
+            print(f"{'':>8}  {profile_page(spec, compiled=compiled)}")
+
+
+if __name__ == '__main__':
+    main()
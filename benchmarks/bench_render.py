@@ -0,0 +1,43 @@
+""" Per-node cost of building and rendering pages from 10 to 1 000 000 divs
+
+    python -m benchmarks.bench_render [--max-divs N]
+"""
+import argparse
+import os
+from time import perf_counter
+
+from source.html_utils import HtmlAdapter, Style
+
+DIVS_PER_SECTION = 100
+
+
+def bench(total_divs: int) -> tuple[float, float]:
+    sections = max(1, total_divs // DIVS_PER_SECTION)
+    divs = min(total_divs, DIVS_PER_SECTION)
+    adapter = HtmlAdapter()
+    start = perf_counter()
+    adapter.director.build_tree(sections_num=sections, divs_num=divs, headers=True,
+                                div_style=Style("container", ".container {}"))
+    built = perf_counter()
+    with open(os.devnull, "w") as sink:
+        adapter.write_html(sink)
+    rendered = perf_counter()
+    return built - start, rendered - built
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-divs", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'divs':>10} {'build, s':>10} {'render, s':>10} {'build ns/div':>13} {'render ns/div':>14}")
+    total_divs = 10
+    while total_divs <= args.max_divs:
+        build, render = bench(total_divs)
+        print(f"{total_divs:>10} {build:>10.4f} {render:>10.4f} "
+              f"{build / total_divs * 1e9:>13.0f} {render / total_divs * 1e9:>14.0f}")
+        total_divs *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+""" Load test of the page service: latency percentiles and throughput of keep-alive clients on localhost
+
+    python -m benchmarks.bench_service [--clients N] [--requests N] [--workers N]
+
+    The service runs in a child process, so the clients do not share its event loop and interpreter lock
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+from typing import Optional
+
+SCENARIOS = {
+    "hot": "a few small pages, served from the cache",
+    "coalesced": "each distinct page asked by all clients at once, one build per page",
+    "conditional": "revalidation with If-None-Match, answered with 304",
+    "streamed": "100k-div pages streamed with chunked encoding",
+}
+
+
+class Client:
+    """ A minimal HTTP/1.1 keep-alive client, enough for Content-Length and chunked responses """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "Client":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def get(self, target: str, headers: Optional[dict[str, str]] = None) -> tuple[int, dict[str, str], bytes]:
+        lines = [f"GET {target} HTTP/1.1", "Host: localhost", *(f"{k}: {v}" for k, v in (headers or {}).items())]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = dict()
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            response_headers[name.lower()] = value.strip()
+        if response_headers.get("transfer-encoding") == "chunked":
+            body = bytearray()
+            while size := int(await self.reader.readline(), 16):
+                body += await self.reader.readexactly(size + 2)
+                del body[-2:]
+            await self.reader.readline()
+            return status, response_headers, bytes(body)
+        return status, response_headers, await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def targets(scenario: str, requests: int, clients: int) -> list[str]:
+    if scenario == "streamed":
+        return [f"/page?sections=1000&divs=100&color=c{index}" for index in range(requests)]
+    if scenario == "coalesced":  # every client asks the same page in the same round
+        return [f"/page?sections=200&divs=50&color=c{index // clients}&headers=1" for index in range(requests)]
+    return [f"/page?sections={index % 4 + 1}&divs=6&color=blue&bordered=1" for index in range(requests)]
+
+
+async def load(host: str, port: int, scenario: str, requests: int, clients: int) -> tuple[list[float], float]:
+    """ The latencies of all requests and the wall time of the scenario """
+    queue = targets(scenario, requests, clients)
+    connections = [await Client.connect(host, port) for _ in range(clients)]
+    etags: dict[str, str] = dict()
+    if scenario == "conditional":
+        for target in set(queue):
+            etags[target] = (await connections[0].get(target))[1]["etag"]
+    latencies = []
+
+    async def run_client(client: Client, mine: list[str]) -> None:
+        for target in mine:
+            start = perf_counter()
+            headers = {"If-None-Match": etags[target]} if target in etags else None
+            status, _, body = await client.get(target, headers)
+            latencies.append(perf_counter() - start)
+            assert status == (304 if headers else 200), status
+            assert headers or body.rstrip().endswith(b"</html>"), body[-100:]
+
+    start = perf_counter()
+    await asyncio.gather(*(run_client(client, queue[index::clients]) for index, client in enumerate(connections)))
+    wall = perf_counter() - start
+    for client in connections:
+        client.close()
+    return latencies, wall
+
+
+async def service_stats(host: str, port: int) -> dict:
+    client = await Client.connect(host, port)
+    try:
+        return json.loads((await client.get("/stats"))[2])
+    finally:
+        client.close()
+
+
+def percentile(values: list[float], share: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[round(share * 100) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "source.service", "--port", "0", "--workers", str(args.workers)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        host, port = server.stdout.readline().rsplit("/", 1)[1].split(":")
+        print(f"{'scenario':>12} {'requests':>9} {'p50, ms':>9} {'p99, ms':>9} {'req/s':>9}")
+        for scenario, description in SCENARIOS.items():
+            requests = args.requests // 20 if scenario == "streamed" else args.requests
+            latencies, wall = asyncio.run(load(host, int(port), scenario, requests, args.clients))
+            print(f"{scenario:>12} {len(latencies):>9} {percentile(latencies, 0.5) * 1000:>9.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>9.2f} {len(latencies) / wall:>9.0f}  {description}")
+        print(f"service stats: {asyncio.run(service_stats(host, int(port)))}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+""" Import time and cold-start latency of the headless generator against the GUI path
+
+    python -m benchmarks.bench_startup [--repeat N]
+
+    The time to the first shown window is compared with the former eager startup, which created the web engine view
+    and scanned the templates before the window was shown. The target is a 2x faster first window
+"""
+import argparse
+import os
+import subprocess
+import sys
+from time import perf_counter
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME = "from time import perf_counter; start = perf_counter(); import {module}; print(perf_counter() - start)"
+HEADLESS_START = ("import sys; from source.generate import main; "
+                  "main(['--sections', '10', '--divs', '10', '-o', {out!r}]); "
+                  "assert not any(name.startswith('PySide6') for name in sys.modules), 'Qt was imported'")
+GUI_START = ("from PySide6.QtWidgets import QApplication; app = QApplication([]); "
+             "from source.app import MainWindow; window = MainWindow(); window.sections_spin.setValue(10); "
+             "window.divs_spin.setValue(10); window.generate()")
+FIRST_WINDOW = ("from time import perf_counter; start = perf_counter(); "
+                "from PySide6.QtCore import QCoreApplication, Qt; from PySide6.QtWidgets import QApplication; "
+                "QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts); app = QApplication([]); "
+                "from source.app import MainWindow; window = MainWindow(); {eager}"
+                "window.show(); app.processEvents(); print(perf_counter() - start)")
+EAGER_STARTUP = ("window.html_render.reload(); window.template_index.refresh(); "
+                 "window.on_templates_scanned(True, window.template_index.names()); ")
+TARGET_SPEEDUP = 2.0
+
+
+def run(code: str) -> Optional[tuple[float, str]]:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    start = perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = perf_counter() - start
+    if result.returncode:
+        print(result.stderr.strip().splitlines()[-1], file=sys.stderr)
+        return None
+    return elapsed, result.stdout
+
+
+def best(code: str, repeat: int, *, from_output: bool = False) -> Optional[float]:
+    timings = []
+    for _ in range(repeat):
+        result = run(code)
+        if result is None:
+            return None
+        elapsed, output = result
+        timings.append(float(output) if from_output else elapsed)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = (
+        ("import source.generate", best(IMPORT_TIME.format(module="source.generate"), args.repeat, from_output=True)),
+        ("import source.app", best(IMPORT_TIME.format(module="source.app"), args.repeat, from_output=True)),
+        ("headless cold start", best(HEADLESS_START.format(out=os.devnull), args.repeat)),
+        ("GUI cold start", best(GUI_START, args.repeat)),
+        ("GUI first window", best(FIRST_WINDOW.format(eager=""), args.repeat, from_output=True)),
+        ("GUI first window, eager", best(FIRST_WINDOW.format(eager=EAGER_STARTUP), args.repeat, from_output=True)),
+    )
+    for name, seconds in rows:
+        print(f"{name:>24}: " + ("unavailable" if seconds is None else f"{seconds * 1000:8.1f} ms"))
+    if rows[2][1] is not None:
+        print("the headless path never imported PySide6")
+    lazy, eager = rows[4][1], rows[5][1]
+    if lazy is not None and eager is not None:
+        speedup = eager / lazy
+        print(f"first window {speedup:.1f}x faster than the eager startup, "
+              f"target {TARGET_SPEEDUP:.0f}x {'met' if speedup >= TARGET_SPEEDUP else 'missed'}")
+
+
+if __name__ == '__main__':
+    main()
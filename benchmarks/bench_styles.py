@@ -0,0 +1,75 @@
+""" Output size and build time of style variants as interned classes against naive inline styles
+
+    python -m benchmarks.bench_styles [--sections N] [--divs N] [--variants N]
+"""
+import argparse
+from itertools import product
+from time import perf_counter
+from typing import Sequence, Union
+
+from source.html_utils import HtmlAdapter, HtmlDirector, Node, Leaf, PageSpec, Style, StyleVariant
+
+COLORS = ("black", "red", "green", "yellow", "blue", "navy", "teal", "olive", "maroon", "purple")
+ALIGNMENTS = ("left", "center", "right")
+
+
+class InlineStyleDirector(HtmlDirector):
+    """ The naive baseline: every div carries its declarations in a "style" attribute, the style block is empty """
+
+    def __init__(self, variants: Sequence[StyleVariant]) -> None:
+        super().__init__()
+        self.variants = variants
+
+    def build_section(self, s_num: Union[int, str], *, divs_num: int, div_style: Union[Style, Sequence[Style]],
+                      headers: bool) -> None:
+        self.html_builder.add("section", strategy=Node)
+        for d_num in range(1, divs_num + 1):
+            variant = self.variants[((int(s_num) - 1) * divs_num + d_num - 1) % len(self.variants)]
+            self.html_builder.add("div", strategy=Node, specs=f'style="{variant.declarations.rstrip()}"')
+            self.html_builder.add(f"section-{s_num} div-{d_num} message", strategy=Leaf)
+            self.html_builder.to_previous()
+        self.html_builder.to_previous()
+
+
+def make_variants(count: int, distinct: int) -> tuple[StyleVariant, ...]:
+    looks = [StyleVariant(color, alignment, bordered)
+             for color, alignment, bordered in product(COLORS, ALIGNMENTS, (False, True))]
+    return tuple(looks[index % distinct % len(looks)] for index in range(count))
+
+
+def timed_html(build) -> tuple[float, str]:
+    start = perf_counter()
+    html = build()
+    return perf_counter() - start, html
+
+
+def build_classes(spec: PageSpec) -> str:
+    adapter = HtmlAdapter()
+    adapter.build_page(spec)
+    return adapter.get_html()
+
+
+def build_inline(spec: PageSpec) -> str:
+    director = InlineStyleDirector(spec.variants)
+    director.build_tree(sections_num=spec.sections, divs_num=spec.divs, div_style=Style("", ""), headers=False)
+    return director.get_html()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=100)
+    parser.add_argument("--divs", type=int, default=100)
+    parser.add_argument("--variants", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'distinct looks':>14} {'layout':>8} {'bytes':>10} {'rules':>6} {'build+render, s':>16}")
+    for distinct in (args.variants, args.variants // 2, 1):
+        spec = PageSpec(sections=args.sections, divs=args.divs, variants=make_variants(args.variants, distinct))
+        for layout, build in (("classes", build_classes), ("inline", build_inline)):
+            seconds, html = timed_html(lambda: build(spec))
+            rules = html.count("{")
+            print(f"{distinct:>14} {layout:>8} {len(html.encode()):>10} {rules:>6} {seconds:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" Template listing and loading as the library grows: a listdir scan against the persistent TemplateIndex
+
+    python -m benchmarks.bench_template_index [--max-templates N]
+"""
+import argparse
+import os
+from fnmatch import fnmatch
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable
+
+from source.generate import generate_page
+from source.html_utils import PageSpec
+from source.template_index import TemplateIndex
+
+
+def timed(action: Callable[[], object]) -> float:
+    start = perf_counter()
+    action()
+    return (perf_counter() - start) * 1000
+
+
+def fill(directory: str, count: int) -> None:
+    content = generate_page(PageSpec(sections=2, divs=3))
+    for num in range(len(os.listdir(directory)), count):
+        with open(os.path.join(directory, PageSpec(sections=num, divs=3).file_name), "w") as template:
+            template.write(content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-templates", type=int, default=30_000)
+    args = parser.parse_args()
+
+    print(f"{'templates':>9} {'listdir':>9} {'cold index':>11} {'startup':>9} {'poll':>7} {'save+poll':>10} "
+          f"{'load':>7} {'reload':>7}  (ms)")
+    with TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "templates")
+        os.mkdir(directory)
+        count = 100
+        while count <= args.max_templates:
+            fill(directory, count)
+            listdir = timed(lambda: tuple(entry for entry in os.listdir(directory) if fnmatch(entry, "*.html")))
+            cold = timed(lambda: TemplateIndex(directory).refresh(force=True))
+            index = TemplateIndex(directory)
+            startup = timed(lambda: TemplateIndex(directory).refresh())
+            poll = timed(index.refresh)
+
+            def save() -> None:
+                with index.saving(f"saved-{count}.html") as path, open(path, "w") as template:
+                    template.write("<!DOCTYPE html>\n")
+                index.refresh()
+
+            saved = timed(save)
+            name = index.names()[0]
+            load = timed(lambda: index.load(name))
+            reload = timed(lambda: index.load(name))
+            print(f"{count:>9} {listdir:>9.2f} {cold:>11.2f} {startup:>9.2f} {poll:>7.3f} {saved:>10.3f} "
+                  f"{load:>7.3f} {reload:>7.3f}")
+            count *= 10 if count < 10_000 else 3
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+""" Wall time and peak memory of loading and saving big templates: plain read/write against mmap and atomic streaming
+
+    python -m benchmarks.bench_template_io [--sizes 1M 100M 1G]
+
+Every (operation, size) pair runs in its own interpreter, so the peak RSS of one does not hide another
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from source.generate import generate_page, save_page
+from source.html_utils import PageSpec
+from source.preview import PreviewSource
+from source.template_io import load_text, save_chunks
+
+UNITS = {"K": 2 ** 10, "M": 2 ** 20, "G": 2 ** 30}
+DIVS_PER_MB = 6_400  # a headers page takes about 160 bytes per div
+
+
+def parse_size(size: str) -> int:
+    unit = UNITS.get(size[-1].upper())
+    return int(size[:-1]) * unit if unit else int(size)
+
+
+def make_template(path: str, size: int) -> None:
+    """ Repeats the body of a real template up to the size """
+    part = generate_page(PageSpec(sections=10, divs=100, headers=True)).encode()
+    with open(path, "wb") as output:
+        for _ in range(max(1, size // len(part))):
+            output.write(part)
+
+
+def read_plain(path: str, output: str) -> None:
+    with open(path, "r") as source:
+        source.read()
+
+
+def read_mmap(path: str, output: str) -> None:
+    load_text(path)
+
+
+def preview_chunks(path: str, output: str) -> None:
+    for _ in PreviewSource(path=path).iter_chunks():
+        pass
+
+
+def write_plain(path: str, output: str) -> None:
+    with open(path, "r") as source, open(output, "w") as target:
+        target.write(source.read())
+
+
+def write_atomic(path: str, output: str) -> None:
+    save_chunks(output, PreviewSource(path=path).iter_chunks())
+
+
+def generate_plain(path: str, output: str) -> None:
+    with open(output, "w") as target:
+        target.write(generate_page(page_spec(os.path.getsize(path))))
+
+
+def generate_atomic(path: str, output: str) -> None:
+    save_page(page_spec(os.path.getsize(path)), output)
+
+
+def page_spec(size: int) -> PageSpec:
+    return PageSpec(sections=max(1, size // 2 ** 20), divs=DIVS_PER_MB, headers=True)
+
+
+OPERATIONS = {
+    "read()": read_plain,
+    "mmap load_text": read_mmap,
+    "preview chunks": preview_chunks,
+    "write()": write_plain,
+    "save_chunks": write_atomic,
+    "get_html+write": generate_plain,
+    "save_page": generate_atomic,
+}
+
+
+def run_operation(name: str, path: str, output: str) -> None:
+    """ The child side: performs one operation and prints its wall time and peak RSS """
+    start = perf_counter()
+    OPERATIONS[name](path, output)
+    seconds = perf_counter() - start
+    print(f"{seconds:.3f} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["1M", "100M", "1G"])
+    parser.add_argument("--run", nargs=3, metavar=("OPERATION", "PATH", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        return run_operation(*args.run)
+
+    print(f"{'size':>6} {'operation':>15} {'seconds':>8} {'peak RSS MB':>12}")
+    with TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path, output = os.path.join(tmp, "template.html"), os.path.join(tmp, "saved.html")
+            make_template(path, parse_size(size))
+            for name in OPERATIONS:
+                result = subprocess.run([sys.executable, "-m", "benchmarks.bench_template_io", "--run", name, path,
+                                         output], check=True, capture_output=True, text=True)
+                seconds, rss = result.stdout.split()
+                print(f"{size:>6} {name:>15} {seconds:>8} {rss:>12}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+""" Thousands of concurrent page builds in one process: every page must be correct and the memory must stay flat
+
+    python -m benchmarks.stress_flyweights [--rounds N] [--builds N] [--threads N]
+"""
+import argparse
+import gc
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+from source.html_utils import HtmlAdapter
+
+SPECS = tuple(product((1, 2), (3, 7), ("red", "blue", ""), ("left", "right"), (False, True)))
+
+
+def build(spec: tuple) -> str:
+    sections, divs, color, alignment, bordered = spec
+    adapter = HtmlAdapter()
+    style = adapter.create_style(color=color, alignment=alignment, bordered=bordered, name=f"{color or 'plain'}")
+    adapter.director.build_tree(sections_num=sections, divs_num=divs, div_style=style, headers=True)
+    return adapter.get_html()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--builds", type=int, default=2_000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    expected = {spec: build(spec) for spec in SPECS}
+    tracemalloc.start()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for round_num in range(1, args.rounds + 1):
+            specs = [SPECS[i % len(SPECS)] for i in range(args.builds)]
+            for spec, html in zip(specs, pool.map(build, specs)):
+                assert html == expected[spec], f"wrong page for {spec}"
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"round {round_num}: {args.builds} correct pages, memory {current / 1024:.0f} KiB "
+                  f"(peak {peak / 1024:.0f} KiB)")
+    tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+""" Builds and renders a 100 000-deep chain and a 1 000 000-wide page far below the recursion limit
+
+    python -m benchmarks.stress_tree [--depth N] [--width N]
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from source.html_render import COMPACT, HtmlRenderer
+from source.html_utils import HtmlBuilder, HtmlDirector, Leaf, Node, Style
+
+
+def render(renderer: HtmlRenderer, tree: list) -> int:
+    with open(os.devnull, "w") as sink:
+        return renderer.write_html(tree, sink)
+
+
+def deep_chain(depth: int) -> tuple[float, float]:
+    start = perf_counter()
+    builder = HtmlBuilder()
+    builder.add("!DOCTYPE", strategy=Leaf, specs="html")
+    for _ in range(depth):
+        builder.add("div", strategy=Node)
+    builder.add("deepest message", strategy=Leaf)
+    for _ in range(depth + 1):
+        builder.to_previous()
+    built = perf_counter()
+    renderer = HtmlRenderer(mode=COMPACT)  # a 100k-deep pretty indentation alone is 20 GB of spaces
+    written = render(renderer, builder.get_result())
+    assert written == len("<!DOCTYPE html>\n") + depth * len("<div>\n</div>\n") + len("deepest message\n")
+    return built - start, perf_counter() - built
+
+
+def wide_page(width: int) -> tuple[float, float]:
+    start = perf_counter()
+    director = HtmlDirector()
+    director.build_tree(sections_num=1, divs_num=width, headers=False, div_style=Style("container", ".container {}"))
+    built = perf_counter()
+    render(director.renderer, director.html_builder.get_result())
+    return built - start, perf_counter() - built
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=100_000)
+    parser.add_argument("--width", type=int, default=1_000_000)
+    args = parser.parse_args()
+    sys.setrecursionlimit(200)
+
+    for name, nodes, (build, render_time) in (("deep chain", args.depth, deep_chain(args.depth)),
+                                             ("wide page", 2 * args.width, wide_page(args.width))):
+        print(f"{name:>10}: {nodes} nodes, build {build:.3f} s ({nodes / build:,.0f} nodes/s), "
+              f"render {render_time:.3f} s ({nodes / render_time:,.0f} nodes/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+""" The benchmark cases of "python -m benchmarks": every case prepares its inputs once and returns the timed function.
+    A case is registered for each point of its size grid, the names look like "HtmlDirector.build_tree[divs=10000]"
+"""
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+
+from source.generate import generate_page
+from source.html_document import HtmlDocument
+from source.html_tags import UniqueTag
+from source.html_utils import HtmlBuilder, HtmlDirector, HtmlAdapter, Leaf, Node, PageSpec
+from source.template_io import load_text, save_chunks
+
+DIVS_PER_SECTION = 100
+DIVS_GRID = (1_000, 10_000, 100_000)
+QUICK_DIVS_GRID = (1_000, 10_000)
+SIZES_GRID = (10 * 2 ** 10, 2 ** 20, 16 * 2 ** 20)
+QUICK_SIZES_GRID = (10 * 2 ** 10, 2 ** 20)
+CALLS = 10_000
+
+Timed = Callable[[], object]
+
+
+@dataclass
+class Case:
+    name: str
+    prepare: Callable[[], Timed]  # returns the function to time, the preparation is not timed
+    group: str = "core"
+
+
+@dataclass
+class Result:
+    loops: int
+    samples: list[float] = field(default_factory=list)  # seconds per call
+
+    def to_json(self) -> dict[str, Any]:
+        return dict(loops=self.loops, samples=self.samples, min=min(self.samples),
+                    median=statistics.median(self.samples), stdev=statistics.pstdev(self.samples))
+
+
+def page_spec(divs: int) -> PageSpec:
+    return PageSpec(sections=max(1, divs // DIVS_PER_SECTION), divs=min(divs, DIVS_PER_SECTION), headers=True)
+
+
+def size_label(size: int) -> str:
+    return f"{size // 2 ** 20}M" if size >= 2 ** 20 else f"{size // 2 ** 10}K"
+
+
+def prepare_builder_add(divs: int) -> Timed:
+    def add() -> None:
+        builder = HtmlBuilder()
+        builder.add("main", strategy=Node)
+        for d_num in range(divs):
+            builder.add("div", strategy=Node, specs="class=container")
+            builder.add(f"div-{d_num} message", strategy=Leaf)
+            builder.to_previous()
+    return add
+
+
+def prepare_build_tree(divs: int) -> Timed:
+    spec = page_spec(divs)
+    style = HtmlAdapter.create_style(color=spec.color, alignment=spec.alignment, bordered=spec.bordered)
+    return lambda: HtmlDirector().build_tree(sections_num=spec.sections, divs_num=spec.divs, div_style=style,
+                                             headers=spec.headers)
+
+
+def prepare_get_html(divs: int) -> Timed:
+    adapter = HtmlAdapter()
+    adapter.build_page(page_spec(divs))
+    return adapter.get_html
+
+
+def prepare_compiled_page(divs: int) -> Timed:
+    spec = page_spec(divs)
+    generate_page(spec)  # the compiled shape is cached, the steady state is timed
+    return lambda: generate_page(spec)
+
+
+def prepare_create_content() -> Timed:
+    builder = HtmlBuilder()
+    values = [("!DOCTYPE", "html"), ("div", "class=container"), ("h1", ""), ("main", ""), ("message", "")]
+    calls = values * (CALLS // len(values))
+
+    return lambda: [builder.create_content(value, specs) for value, specs in calls]  # kept alive like in a tree
+
+
+def prepare_unique_tag() -> Timed:
+    names = ["html", "head", "body", "header", "main", "footer"] * (CALLS // 6)
+    return lambda: [UniqueTag(name) for name in names]
+
+
+def prepare_template_save(size: int) -> Timed:
+    text = template_text(size)
+    path = os.path.join(temp_directory(), f"save-{size}.html")
+    return lambda: save_chunks(path, (text,))
+
+
+def prepare_template_load(size: int) -> Timed:
+    path = os.path.join(temp_directory(), f"load-{size}.html")
+    with open(path, "w") as template:
+        template.write(template_text(size))
+    return lambda: load_text(path)
+
+
+def template_text(size: int) -> str:
+    part = generate_page(PageSpec(sections=2, divs=6, headers=True, bordered=True, color="blue"))
+    return (part * (size // len(part) + 1))[:size]
+
+
+_temp_directory: Optional[tempfile.TemporaryDirectory] = None
+
+
+def temp_directory() -> str:
+    """ One directory for the template files of the run, it is removed at exit """
+    global _temp_directory
+    if _temp_directory is None:
+        _temp_directory = tempfile.TemporaryDirectory(prefix="benchmarks-")
+    return _temp_directory.name
+
+
+def prepare_main_window_generate(divs: int) -> Timed:
+    """ MainWindow.generate offscreen, from the click to the text shown by the worker thread result """
+    from PySide6.QtCore import QEventLoop
+    from PySide6.QtWidgets import QApplication
+    from source.app import MainWindow
+
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow()
+    spec = page_spec(divs)
+    window.sections_spin.setMaximum(spec.sections)
+    window.sections_spin.setValue(spec.sections)
+    window.divs_spin.setMaximum(spec.divs)
+    window.divs_spin.setValue(spec.divs)
+    window.headers_check.setChecked(True)
+    loop = QEventLoop()
+    window.temp_generated.connect(loop.quit)
+
+    def generate() -> None:
+        window.document = HtmlDocument()  # a cold document, so every call regenerates the sections
+        window.generate()
+        loop.exec()
+        app.processEvents()
+    return generate
+
+
+def cases(*, quick: bool = False) -> list[Case]:
+    divs_grid = QUICK_DIVS_GRID if quick else DIVS_GRID
+    sizes_grid = QUICK_SIZES_GRID if quick else SIZES_GRID
+    found = [Case("HtmlBuilder.create_content[calls=10000]", prepare_create_content),
+             Case("UniqueTag[calls=10000]", prepare_unique_tag)]
+    for divs in divs_grid:
+        found += [Case(f"HtmlBuilder.add[divs={divs}]", lambda divs=divs: prepare_builder_add(divs)),
+                  Case(f"HtmlDirector.build_tree[divs={divs}]", lambda divs=divs: prepare_build_tree(divs)),
+                  Case(f"HtmlAdapter.get_html[divs={divs}]", lambda divs=divs: prepare_get_html(divs)),
+                  Case(f"generate_page[divs={divs}]", lambda divs=divs: prepare_compiled_page(divs))]
+    for size in sizes_grid:
+        found += [Case(f"template.save[size={size_label(size)}]", lambda size=size: prepare_template_save(size), "io"),
+                  Case(f"template.load[size={size_label(size)}]", lambda size=size: prepare_template_load(size), "io")]
+    for divs in divs_grid:
+        found.append(Case(f"MainWindow.generate[divs={divs}]",
+                          lambda divs=divs: prepare_main_window_generate(divs), "gui"))
+    return found
+
+
+def measure(timed: Timed, *, repeat: int, min_time: float) -> Result:
+    """ timeit-like: the number of loops is raised until a sample takes "min_time", then "repeat" samples are taken """
+    loops = 1
+    while True:
+        elapsed = _run(timed, loops)
+        if elapsed >= min_time or loops >= 10 ** 6:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    result = Result(loops, [elapsed / loops])
+    for _ in range(repeat - 1):
+        result.samples.append(_run(timed, loops) / loops)
+    return result
+
+
+def _run(timed: Timed, loops: int) -> float:
+    start = perf_counter()
+    for _ in range(loops):
+        timed()
+    return perf_counter() - start
+
+
+def metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return dict(date=datetime.now(timezone.utc).isoformat(timespec="seconds"), commit=commit,
+                python=sys.version.split()[0], implementation=platform.python_implementation(),
+                platform=platform.platform(), cpu_count=os.cpu_count())
+
+
+def iter_results(selected: list[Case], *, repeat: int, min_time: float) -> Iterator[tuple[Case, Optional[Result], str]]:
+    """ Yields (case, result, error), a case whose dependencies are missing (e.g. PySide6) is reported and skipped """
+    for case in selected:
+        try:
+            timed = case.prepare()
+        except ImportError as error:
+            yield case, None, f"unavailable ({error})"
+            continue
+        yield case, measure(timed, repeat=repeat, min_time=min_time), ""
@@ -16,8 +16,8 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
     QImage, QKeySequence, QLinearGradient, QPainter,
     QPalette, QPixmap, QRadialGradient, QTransform)
 from PySide6.QtWidgets import (QApplication, QCheckBox, QComboBox, QLabel,
-    QMainWindow, QPushButton, QSizePolicy, QSpinBox,
-    QStatusBar, QWidget)
+    QMainWindow, QProgressBar, QPushButton, QSizePolicy,
+    QSpinBox, QStatusBar, QWidget)
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -103,6 +103,14 @@ class Ui_MainWindow(object):
         self.headers_check = QCheckBox(self.centralwidget)
         self.headers_check.setObjectName(u"headers_check")
         self.headers_check.setGeometry(QRect(730, 330, 111, 20))
+        self.cancel_btn = QPushButton(self.centralwidget)
+        self.cancel_btn.setObjectName(u"cancel_btn")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setGeometry(QRect(780, 528, 61, 24))
+        self.generate_progress = QProgressBar(self.centralwidget)
+        self.generate_progress.setObjectName(u"generate_progress")
+        self.generate_progress.setGeometry(QRect(580, 566, 261, 16))
+        self.generate_progress.setValue(0)
         MainWindow.setCentralWidget(self.centralwidget)
         self.statusbar = QStatusBar(MainWindow)
         self.statusbar.setObjectName(u"statusbar")
@@ -142,5 +150,6 @@ class Ui_MainWindow(object):
 
         self.text_color_label.setText(QCoreApplication.translate("MainWindow", u"Text color:", None))
         self.headers_check.setText(QCoreApplication.translate("MainWindow", u"add headers", None))
+        self.cancel_btn.setText(QCoreApplication.translate("MainWindow", u"Cancel", None))
     # retranslateUi
 
@@ -1,5 +1,6 @@
 from sys import argv
 
+from PySide6.QtCore import QCoreApplication, Qt
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QApplication
 
@@ -7,6 +8,7 @@ from source.app import MainWindow
 
 
 def main():
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)  # required by QtWebEngine imported after the app
     app = QApplication(argv)
     window = MainWindow()
     window.setWindowIcon(QIcon("designed_ui/icons/logo.png"))
@@ -1,47 +1,77 @@
 import os
+from abc import ABCMeta
 from enum import IntEnum
-from fnmatch import fnmatch
+from typing import TYPE_CHECKING, Generator, Iterator, Optional
 
-from PySide6.QtCore import Signal
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtWidgets import QInputDialog, QMainWindow, QStackedLayout, QTextEdit
+from PySide6.QtCore import QThreadPool, QTimer, QUrl, Signal
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QInputDialog, QMainWindow, QPlainTextEdit, QStackedLayout
 
 from designed_ui.designed_interface import Ui_MainWindow
-from source.html_utils import HtmlAdapter, HtmlWidget
+from source.html_document import HtmlDocument
+from source.html_parser import HtmlParseError, HtmlParser
+from source.html_render import HtmlRenderer, OutputMode, OUTPUT_MODES, PRETTY
+from source.html_utils import HtmlDirector, HtmlWidget, PageSpec
+from source.preview import LAZY_THRESHOLD, PreviewSource
+from source.profiling import PipelineStats
+from source.template_index import TemplateIndex
+from source.template_io import save_chunks
+from source.workers import GenerationTask, TemplateScanTask
 
+if TYPE_CHECKING:
+    from PySide6.QtWebEngineWidgets import QWebEngineView
 
-class MainWindow(QMainWindow, Ui_MainWindow, HtmlWidget):
+
+class _ABCQObjectMeta(type(QMainWindow), ABCMeta): ...
+
+
+class MainWindow(QMainWindow, Ui_MainWindow, HtmlWidget, metaclass=_ABCQObjectMeta):
     temp_saved = Signal()
     temp_loaded = Signal()
     temp_generated = Signal()
+    temp_progress = Signal(int)
 
     class Mode(IntEnum):
         TEXT = 0
         HTML = 1
 
+    templates_poll_ms = 2000
+
     def __init__(self):
         super().__init__()
         self.setupUi(self)
         self.current_dir = os.path.dirname(os.path.abspath(__file__))
+        self.document = HtmlDocument()
+        self.generation_task: Optional[GenerationTask] = None
+        self.preview: Optional[PreviewSource] = None  # set while a big document is loaded by chunks
+        self.render_source: Optional[PreviewSource] = None
+        self.text_chunks: Optional[Generator[str, None, None]] = None
 
-        self.update_templates()
-        self.text_edit = QTextEdit()
-        self.html_render = QWebEngineView()
-        self.html_render.reload()
+        self.template_index = TemplateIndex()
+        self.template_scan: Optional[TemplateScanTask] = None
+        QTimer.singleShot(0, self.update_templates)  # the scan starts once the event loop shows the window
+        self.templates_poll = QTimer(self)
+        self.templates_poll.setInterval(self.templates_poll_ms)
+        self.text_edit = QPlainTextEdit()
+        self._html_render: Optional["QWebEngineView"] = None
         self.text_lay = QStackedLayout()
         self.text_lay.setStackingMode(QStackedLayout.StackOne)
         self.text_lay.addWidget(self.text_edit)
-        self.text_lay.addWidget(self.html_render)
         self.text_view.setLayout(self.text_lay)
         # ---------------------------- connections----------------------------------------
         self.text_btn.clicked.connect(self.show_text)
         self.render_btn.clicked.connect(self.show_html)
         self.generate_btn.clicked.connect(self.generate)
-        self.clear_btn.clicked.connect(self.text_edit.clear)
+        self.cancel_btn.clicked.connect(self.cancel_generation)
+        self.temp_progress.connect(self.generate_progress.setValue)
+        self.text_edit.verticalScrollBar().valueChanged.connect(self.load_more_text)
+        self.clear_btn.clicked.connect(self.clear_text)
         self.clear_btn.clicked.connect(self.show_text)
         self.save_btn.clicked.connect(self.save_modal)
         self.load_btn.clicked.connect(self.load_template)
         self.temp_saved.connect(self.update_templates)
+        self.templates_poll.timeout.connect(self.update_templates)
+        self.templates_poll.start()
         self.temp_loaded.connect(self.show_text)
         self.temp_generated.connect(self.show_text)
         # ---------------------------------------------------------------------------------
@@ -71,43 +101,180 @@ class MainWindow(QMainWindow, Ui_MainWindow, HtmlWidget):
         return self.headers_check.isChecked()
 
     def generate(self) -> None:
-        html_agent = HtmlAdapter()
-        html_agent.build_page(self)
-        html_text = html_agent.get_html()
-        self.text_edit.setPlainText(html_text)
+        """ Starts the generation in the global thread pool, the document is only touched by one task at a time """
+        if self.generation_task is not None:
+            return
+        self.generation_task = GenerationTask(self.document, PageSpec.from_widget(self))
+        self.generation_task.signals.progress.connect(self.temp_progress)
+        self.generation_task.signals.stats.connect(self.show_stats)
+        self.generation_task.signals.finished.connect(self.on_generated)
+        self.generation_task.signals.cancelled.connect(self.on_generation_cancelled)
+        self.generation_task.signals.failed.connect(self.on_generation_failed)
+        self.set_generating(True)
+        self.temp_progress.emit(0)
+        QThreadPool.globalInstance().start(self.generation_task)
+
+    def cancel_generation(self) -> None:
+        if self.generation_task is not None:
+            self.generation_task.cancel()
+
+    def on_generated(self, source: PreviewSource) -> None:
+        self.set_generating(False)
+        self.set_preview(source)
         self.temp_generated.emit()
 
+    def show_stats(self, stats: PipelineStats) -> None:
+        self.statusbar.showMessage(f"Generated: {stats}")
+
+    def on_generation_cancelled(self) -> None:
+        self.set_generating(False)
+        self.temp_progress.emit(0)
+
+    def on_generation_failed(self, message: str) -> None:
+        self.on_generation_cancelled()
+        self.statusbar.showMessage(f"Generation failed: {message}")
+
+    def set_generating(self, generating: bool) -> None:
+        if not generating:
+            self.generation_task = None
+        self.generate_btn.setEnabled(not generating)
+        self.cancel_btn.setEnabled(generating)
+
     def show_text(self) -> None:
         self.text_lay.setCurrentIndex(self.Mode.TEXT)
 
+    def set_preview(self, source: PreviewSource) -> None:
+        """ A small document goes to the text pane at once, a big one is appended by chunks as the pane is scrolled """
+        self.clear_text()
+        if source.is_lazy:
+            self.preview = source
+            self.text_edit.setReadOnly(True)
+            self.text_chunks = source.iter_chunks()
+            self.load_more_text()
+        else:
+            self.text_edit.setPlainText(source.text)
+
+    def load_more_text(self) -> None:
+        if self.text_chunks is None:
+            return
+        scroll_bar = self.text_edit.verticalScrollBar()
+        if scroll_bar.value() < scroll_bar.maximum() - scroll_bar.pageStep():
+            return
+        chunk = next(self.text_chunks, None)
+        if chunk is None:
+            self.text_chunks = None
+            return
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(chunk)
+
+    def clear_text(self) -> None:
+        if self.text_chunks is not None:
+            self.text_chunks.close()  # releases the mapping of the file, Windows can not remove a mapped file
+            self.text_chunks = None
+        if self.preview is not None:
+            self.preview.close()
+            self.preview = None
+        self.text_edit.setReadOnly(False)
+        self.text_edit.clear()
+
+    def iter_text(self) -> Iterator[str]:
+        if self.preview is not None:
+            return self.preview.iter_chunks()
+        return iter((self.text_edit.toPlainText(),))
+
+    def iter_output(self, mode: OutputMode) -> Iterator[str]:
+        """ The text is saved as it is in the pretty mode, other modes render it again through the parser """
+        if mode == PRETTY:
+            return self.iter_text()
+        parser = HtmlParser()
+        if self.preview is not None:
+            builder = parser.parse_file(self.preview.path)
+        else:
+            builder = parser.parse(self.text_edit.toPlainText())
+        if not builder.get_result():
+            return self.iter_text()
+        return HtmlDirector(builder, HtmlRenderer(mode=mode)).iter_html()
+
+    @property
+    def html_render(self) -> "QWebEngineView":
+        """ The web engine dominates the startup, so it is only imported and created by the first render """
+        if self._html_render is None:
+            from PySide6.QtWebEngineWidgets import QWebEngineView
+            self._html_render = QWebEngineView()
+            self.text_lay.insertWidget(self.Mode.HTML, self._html_render)
+        return self._html_render
+
     def show_html(self) -> None:
-        self.html_render.setHtml(self.text_edit.toPlainText())
+        """ setHtml is limited to ~2 MB, so big documents are loaded by a file URL """
+        if self.render_source is not None:
+            self.render_source.close()
+            self.render_source = None
+        if self.preview is not None:
+            self.html_render.load(QUrl.fromLocalFile(self.preview.to_file()))
+        else:
+            text = self.text_edit.toPlainText()
+            if len(text) > LAZY_THRESHOLD:
+                self.render_source = PreviewSource.from_text(text)
+                self.html_render.load(QUrl.fromLocalFile(self.render_source.to_file()))
+            else:
+                self.html_render.setHtml(text)
         self.text_lay.setCurrentIndex(self.Mode.HTML)
 
     def save_modal(self) -> None:
         modal = QInputDialog()
         modal.setWindowTitle("HTML template saving")
         modal.setLabelText("Enter filename:")
-        modal.exec()
-        if modal.accepted:
-            self.save_template(modal.textValue())
+        if not modal.exec():
+            return
+        mode_name, chosen = QInputDialog.getItem(self, "HTML template saving", "Output mode:", list(OUTPUT_MODES),
+                                                 0, False)
+        if chosen:
+            self.save_template(modal.textValue(), OUTPUT_MODES[mode_name])
 
-    def save_template(self, filename) -> None:
-        with open(f"templates/{filename.rstrip('.html')}.html", "w") as output:
-            output.write(self.text_edit.toPlainText())
+    def save_template(self, filename, mode: OutputMode = PRETTY) -> None:
+        template_name = f"{filename.removesuffix('.html')}.html"
+        try:
+            self._save_chunks(template_name, self.iter_output(mode))
+        except HtmlParseError as error:  # the markup can not be re-rendered, the atomic write has left no partial file
+            self.statusbar.showMessage(f"Saved without re-rendering: {error}")
+            self._save_chunks(template_name, self.iter_text())
+        if self.templates.findText(template_name) < 0:
+            self.templates.addItem(template_name)
         self.temp_saved.emit()
 
+    def _save_chunks(self, template_name: str, chunks: Iterator[str]) -> None:
+        with self.template_index.saving(template_name) as path:
+            save_chunks(path, chunks)
+
     def update_templates(self) -> None:
-        self.templates.clear()
-        self.templates.addItems(self.get_templates())
+        """ Polls the template index in the thread pool, the combobox is filled by "on_templates_scanned" """
+        if self.template_scan is not None:
+            return
+        self.template_scan = TemplateScanTask(self.template_index)
+        self.template_scan.signals.finished.connect(self.on_templates_scanned)
+        QThreadPool.globalInstance().start(self.template_scan)
 
-    @staticmethod
-    def get_templates() -> tuple[str, ...]:
-        return tuple(entry for entry in os.listdir("templates") if fnmatch(entry, "*.html"))
+    def on_templates_scanned(self, changed: bool, names: list[str]) -> None:
+        """ The combobox is only repopulated when the directory has changed """
+        self.template_scan = None
+        if changed or self.templates.count() != len(names):
+            current = self.templates.currentText()
+            self.templates.clear()
+            self.templates.addItems(names)
+            self.templates.setCurrentText(current)
 
     def load_template(self) -> None:
         template_name = str(self.templates.currentText())
-        with open(f"templates/{template_name}", "r") as temp:
-            template_text = temp.read()
-            self.text_edit.setPlainText(template_text)
-            self.temp_loaded.emit()
+        path = self.template_index.path(template_name)
+        if os.path.getsize(path) > LAZY_THRESHOLD:
+            self.set_preview(PreviewSource.from_file(path))
+        else:
+            self.set_preview(PreviewSource.from_text(self.template_index.load(template_name)))
+        self.temp_loaded.emit()
+
+    def closeEvent(self, event) -> None:
+        self.clear_text()
+        if self.render_source is not None:
+            self.render_source.close()
+        super().closeEvent(event)
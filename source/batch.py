@@ -0,0 +1,136 @@
+""" Bulk generation of many page variants across a process pool:
+
+    python -m source.batch manifest.json -o pages/ --workers 8 [--unordered]
+
+    The manifest is a JSON list of objects or a CSV file with a header row, the keys are the PageSpec fields
+    and an optional "name" of the output file
+"""
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, fields
+from itertools import islice
+from time import perf_counter
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from source.generate import write_page
+from source.html_utils import PageSpec, StyleVariant
+
+Entry = tuple[str, PageSpec]
+
+
+@dataclass
+class BatchReport:
+    pages: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.pages} pages, {self.bytes / 2 ** 20:.1f} MB in {self.seconds:.3f} s "
+                f"({self.pages_per_second:,.0f} pages/s)")
+
+
+def parse_spec(row: dict[str, Any]) -> PageSpec:
+    """ Converts the values of a JSON object or a CSV row to the types of the PageSpec fields """
+    return PageSpec(**convert_fields(PageSpec, row))
+
+
+def parse_variant(value: Any) -> StyleVariant:
+    if not isinstance(value, dict):
+        raise TypeError(f"a style variant is an object, not {value!r}")
+    if unknown := value.keys() - {field.name for field in fields(StyleVariant)}:
+        raise TypeError(f"unknown style variant fields: {', '.join(map(str, unknown))}")
+    return StyleVariant(**convert_fields(StyleVariant, value))
+
+
+def convert_fields(cls: type, row: dict[str, Any]) -> dict[str, Any]:
+    """ The values of the "cls" dataclass fields in "row": "1", "true", "yes", "on" are true, the scalars are cast """
+    values = dict()
+    for field in fields(cls):
+        if field.name not in row:
+            continue
+        value = row[field.name]
+        if field.name != "variants" and not isinstance(value, (str, int, float)):  # a list or null is no scalar
+            raise TypeError(f"{field.name} is a {field.type.__name__}, not {value!r}")
+        if field.type is bool and isinstance(value, str):
+            value = value.strip().lower() in ("1", "true", "yes", "on")
+        elif field.name == "variants":  # a list of objects, a CSV cell holds it as a JSON string or is blank
+            if isinstance(value, str):
+                value = json.loads(value) if value.strip() else ()
+            value = [parse_variant(variant) for variant in value]
+        values[field.name] = field.type(value)
+    return values
+
+
+def load_manifest(path: str) -> list[Entry]:
+    with open(path, newline="") as manifest:
+        rows = list(csv.DictReader(manifest, restval="")) if path.endswith(".csv") else json.load(manifest)
+    entries, names = [], set()
+    for row in rows:
+        spec = parse_spec(row)
+        name = row.get("name") or spec.file_name
+        if name in names:  # the shards run in parallel, one page would silently overwrite the other
+            raise ValueError(f"{path}: duplicate output name {name!r}")
+        names.add(name)
+        entries.append((name, spec))
+    return entries
+
+
+def render_shard(shard: list[Entry], output_dir: str) -> list[tuple[str, int]]:
+    """ Runs in a worker process, the pages are written to disk there instead of being sent back """
+    written = []
+    for name, spec in shard:
+        with open(os.path.join(output_dir, name), "wb") as output:
+            written.append((name, write_page(spec, output)))
+    return written
+
+
+def iter_shards(entries: Iterable[Entry], shard_size: int) -> Iterator[list[Entry]]:
+    entries = iter(entries)
+    while shard := list(islice(entries, shard_size)):
+        yield shard
+
+
+def generate_batch(entries: Sequence[Entry], output_dir: str, *, workers: Optional[int] = None,
+                   ordered: bool = True, shard_size: int = 8) -> Iterator[tuple[str, int]]:
+    """ Yields (file name, written bytes) in the manifest order or, if not "ordered", as the shards complete """
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_shard, shard, output_dir) for shard in iter_shards(entries, shard_size)]
+        for future in (futures if ordered else as_completed(futures)):
+            yield from future.result()
+
+
+def run_batch(entries: Sequence[Entry], output_dir: str, **kwargs) -> BatchReport:
+    report = BatchReport()
+    start = perf_counter()
+    for _, written in generate_batch(entries, output_dir, **kwargs):
+        report.pages += 1
+        report.bytes += written
+    report.seconds = perf_counter() - start
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m source.batch", description="Generates the pages of a manifest")
+    parser.add_argument("manifest", help="JSON or CSV file with the page specs")
+    parser.add_argument("-o", "--output-dir", default="pages", help="directory for the generated pages")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes, all cores by default")
+    parser.add_argument("--shard-size", type=int, default=8, help="pages rendered by one task")
+    parser.add_argument("--unordered", action="store_true", help="report the pages as soon as they are written")
+    args = parser.parse_args(argv)
+
+    entries = load_manifest(args.manifest)
+    report = run_batch(entries, args.output_dir, workers=args.workers, ordered=not args.unordered,
+                       shard_size=args.shard_size)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
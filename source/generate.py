@@ -0,0 +1,87 @@
+""" Headless page generation, it never imports PySide6:
+
+    python -m source.generate --sections 2 --divs 6 --color blue --alignment left --bordered --headers -o page.html
+"""
+import argparse
+import sys
+from typing import IO, Iterator, Optional, Sequence
+
+from source.html_compiler import page_compiler
+from source.html_compress import COMPRESSIONS, write_compressed
+from source.html_render import HtmlRenderer, OutputMode, OUTPUT_MODES, PRETTY
+from source.html_utils import HtmlAdapter, PageSpec
+from source.profiling import cprofiled, profile_page
+from source.template_io import atomic_writer
+
+
+def iter_page(spec: PageSpec, *, compiled: bool = True, mode: OutputMode = PRETTY) -> Iterator[str]:
+    """ The compiled page shape is used by default, "compiled=False" or an uncompilable spec build the whole tree """
+    if compiled and page_compiler(mode).supports(spec):
+        return page_compiler(mode).iter_html(spec)
+    adapter = HtmlAdapter(mode=mode)
+    adapter.build_page(spec)
+    return adapter.iter_html()
+
+
+def generate_page(spec: PageSpec, *, compiled: bool = True, mode: OutputMode = PRETTY) -> str:
+    return "".join(iter_page(spec, compiled=compiled, mode=mode))
+
+
+def write_page(spec: PageSpec, stream: IO, *, compiled: bool = True, mode: OutputMode = PRETTY,
+               compression: Optional[str] = None) -> int:
+    """ Streams the page to a text or binary file-like object without building the whole string,
+        a compressed page needs a binary one
+    """
+    chunks = iter_page(spec, compiled=compiled, mode=mode)
+    if compression is not None:
+        return write_compressed(chunks, stream, compression)
+    return HtmlRenderer().write_chunks(chunks, stream)
+
+
+def save_page(spec: PageSpec, path: str, **options) -> int:
+    """ Streams the page from the renderer to a temporary file that atomically replaces "path",
+        "options" are the ones of write_page
+    """
+    with atomic_writer(path, "wb") as output:
+        return write_page(spec, output, **options)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m source.generate", description="Generates a html page")
+    parser.add_argument("--sections", type=int, default=PageSpec.sections, help="number of sections")
+    parser.add_argument("--divs", type=int, default=PageSpec.divs, help="number of divs per section")
+    parser.add_argument("--color", default=PageSpec.color, help="text color of the divs")
+    parser.add_argument("--alignment", default=PageSpec.alignment, help="text alignment of the divs")
+    parser.add_argument("--bordered", action="store_true", help="draw a border around the divs")
+    parser.add_argument("--headers", action="store_true", help="wrap the div messages into h1-h6 headers")
+    parser.add_argument("--tree", action="store_true", help="build the whole tree instead of the compiled page")
+    parser.add_argument("--mode", choices=OUTPUT_MODES, default=PRETTY.name, help="whitespace of the output")
+    parser.add_argument("--compress", choices=COMPRESSIONS, help="compress the output stream")
+    parser.add_argument("--profile", action="store_true", help="print the pipeline stats to the standard error")
+    parser.add_argument("--cprofile", metavar="FILE", help="dump the cProfile stats of the generation to FILE")
+    parser.add_argument("-o", "--output", default="-", help="output file, the standard output by default")
+    return parser.parse_args(argv)
+
+
+def spec_from_args(args: argparse.Namespace) -> PageSpec:
+    return PageSpec(sections=args.sections, divs=args.divs, bordered=args.bordered, headers=args.headers,
+                    color=args.color, alignment=args.alignment)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    spec = spec_from_args(args)
+    options = dict(compiled=not args.tree, mode=OUTPUT_MODES[args.mode], compression=args.compress)
+    write = profile_page if args.profile else write_page
+    with cprofiled(args.cprofile):
+        if args.output == "-":
+            result = write(spec, sys.stdout if args.compress is None else sys.stdout.buffer, **options)
+        else:
+            with atomic_writer(args.output, "wb") as output:
+                result = write(spec, output, **options)
+    if args.profile:
+        print(result, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
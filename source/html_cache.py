@@ -0,0 +1,104 @@
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import attrgetter
+from threading import Lock
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+DEFAULT_CACHE_BYTES = 64 * 2 ** 20
+
+Value = TypeVar("Value")
+
+
+class SectionTemplate:
+    """ A section rendered once with a placeholder instead of its number, filling it is a single join """
+    __slots__ = ("parts", "size")
+
+    placeholder = "\x00"
+
+    def __init__(self, rendered: str) -> None:
+        self.parts = rendered.split(self.placeholder)
+        self.size = sum(map(sys.getsizeof, self.parts))
+
+    def fill(self, s_num: int) -> str:
+        return str(s_num).join(self.parts)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    items: int
+    size: int
+
+
+class LRUCache(Generic[Value]):
+    """ A thread-safe LRU cache bounded by the size of its values in bytes """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, *,
+                 sizeof: Callable[[Value], int] = sys.getsizeof) -> None:
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._values: OrderedDict[Hashable, tuple[Value, int]] = OrderedDict()
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Value]) -> Value:
+        value = self.peek(key)
+        if value is None:
+            value = factory()  # created outside the lock, a concurrent miss creates the same value twice
+            self.put(key, value)
+        return value
+
+    def peek(self, key: Hashable) -> Optional[Value]:
+        """ The cached value or None, counted as a hit or a miss """
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            self._values.move_to_end(key)
+            self._hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Value) -> None:
+        """ Stores the value unless the key is already cached, the first stored value wins """
+        with self._lock:
+            if key not in self._values:
+                size = self._sizeof(value)
+                self._values[key] = (value, size)
+                self._size += size
+                self._evict()
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            if (item := self._values.pop(key, None)) is not None:
+                self._size -= item[1]
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and len(self._values) > 1:
+            _, (_, size) = self._values.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._size = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._values), self._size)
+
+
+class FragmentCache(LRUCache[SectionTemplate]):
+    """ The cache of section templates shared by the documents """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        super().__init__(max_bytes, sizeof=attrgetter("size"))
+
+
+FRAGMENT_CACHE = FragmentCache()
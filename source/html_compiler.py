@@ -0,0 +1,101 @@
+import sys
+from functools import lru_cache
+from operator import attrgetter
+from typing import IO, Iterator, Optional
+
+from source.html_cache import FRAGMENT_CACHE, FragmentCache, LRUCache, SectionTemplate
+from source.html_render import HtmlRenderer, OutputMode, PRETTY
+from source.html_tags import TagFlyweights
+from source.html_utils import HtmlAdapter, HtmlBuilder, HtmlDirector, PageSpec, Style
+
+COMPILED_PAGES_BYTES = 16 * 2 ** 20
+CHUNK_SIZE = 256 * 2 ** 10
+
+
+class CompiledPage:
+    """ A page shape rendered once: the head up to the sections, the section template and the tail.
+        Producing a page of any number of sections is a loop of joins
+    """
+    __slots__ = ("head", "section", "tail", "size")
+
+    def __init__(self, head: str, section: SectionTemplate, tail: str) -> None:
+        self.head = head
+        self.section = section
+        self.tail = tail
+        self.size = sys.getsizeof(head) + section.size + sys.getsizeof(tail)
+
+    def iter_html(self, sections: int, *, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """ Yields the head, the sections joined by chunks of about "chunk_size" characters and the tail """
+        yield self.head
+        parts = self.section.parts
+        per_chunk = max(1, chunk_size // max(1, sum(map(len, parts))))
+        for first in range(1, sections + 1, per_chunk):
+            yield "".join([str(s_num).join(parts) for s_num in range(first, min(first + per_chunk, sections + 1))])
+        yield self.tail
+
+
+class PageCompiler:
+    """ Compiles the shape of a page spec (style, divs, headers) into a CompiledPage through the tree builder.
+        Section templates are shared with HtmlDocument through the fragment cache
+    """
+
+    section_level = 3  # html > body > main > section
+
+    def __init__(self, renderer: Optional[HtmlRenderer] = None, cache: FragmentCache = FRAGMENT_CACHE,
+                 pages_bytes: int = COMPILED_PAGES_BYTES) -> None:
+        self.renderer = renderer or HtmlRenderer()
+        self.cache = cache
+        self.flyweights = TagFlyweights()
+        self.pages: LRUCache[CompiledPage] = LRUCache(pages_bytes, sizeof=attrgetter("size"))
+
+    @staticmethod
+    def supports(spec: PageSpec) -> bool:
+        """ The divs of a page with style variants differ from section to section, it is built as a tree """
+        return not spec.variants
+
+    def compile(self, spec: PageSpec) -> CompiledPage:
+        style = HtmlAdapter.create_style(color=spec.color, alignment=spec.alignment, bordered=spec.bordered)
+        key = (style.body, style.name, spec.divs, spec.headers, self.renderer.mode)
+        return self.pages.get(key, lambda: CompiledPage(*self._compile_parts(spec, style)))
+
+    def _compile_parts(self, spec: PageSpec, style: Style) -> tuple[str, SectionTemplate, str]:
+        head, tail = self.render_frame(style)
+        return head, self.section_template(spec.divs, spec.headers, style), tail
+
+    def iter_html(self, spec: PageSpec) -> Iterator[str]:
+        return self.compile(spec).iter_html(spec.sections)
+
+    def write_html(self, spec: PageSpec, stream: IO) -> int:
+        return self.renderer.write_chunks(self.iter_html(spec), stream)
+
+    def get_html(self, spec: PageSpec) -> str:
+        return "".join(self.iter_html(spec))
+
+    def render_frame(self, style: Style) -> tuple[str, str]:
+        """ Renders the page without sections and splits it where the sections go """
+        director = self._new_director()
+        director.build_head(style)
+        director.build_footer()
+        html = "".join(self.renderer.iter_html(director.html_builder.get_result()))
+        main_close = self.renderer.indents[self.section_level - 1] + "</main>" + self.renderer.newline
+        head, main_close, tail = html.partition(main_close)
+        return head, main_close + tail
+
+    def section_template(self, divs: int, headers: bool, style: Style) -> SectionTemplate:
+        key = (divs, headers, style.name, self.section_level, self.renderer.mode)
+        return self.cache.get(key, lambda: self._render_section_template(divs, headers, style))
+
+    def _render_section_template(self, divs: int, headers: bool, style: Style) -> SectionTemplate:
+        director = self._new_director()
+        director.build_section(SectionTemplate.placeholder, divs_num=divs, div_style=style, headers=headers)
+        section_node = director.html_builder.get_result()[0]
+        return SectionTemplate("".join(self.renderer.iter_lines(section_node, self.section_level)))
+
+    def _new_director(self) -> HtmlDirector:
+        return HtmlDirector(HtmlBuilder(self.flyweights), self.renderer)
+
+
+@lru_cache(maxsize=None)
+def page_compiler(mode: OutputMode = PRETTY) -> PageCompiler:
+    """ The shared compiler of the output mode, all of them share the fragment cache """
+    return PageCompiler(HtmlRenderer(mode=mode))
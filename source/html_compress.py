@@ -0,0 +1,40 @@
+import zlib
+from typing import IO, Iterable, Iterator
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip and deflate are always available
+    brotli = None
+
+COMPRESSION_LEVEL = 6
+ZLIB_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+COMPRESSIONS = (*ZLIB_WBITS, "br") if brotli is not None else tuple(ZLIB_WBITS)
+
+
+def compress_chunks(chunks: Iterable[str], method: str = "gzip", *, level: int = COMPRESSION_LEVEL,
+                    encoding: str = "utf-8") -> Iterator[bytes]:
+    """ A streaming stage after the renderer: the chunks are compressed one by one, the page is never held whole.
+        "deflate" is the zlib format of the HTTP "deflate" content coding
+    """
+    if method not in COMPRESSIONS:
+        raise ValueError(f"unknown compression {method!r}, expected one of {', '.join(COMPRESSIONS)}")
+    if method == "br":
+        compressor = brotli.Compressor(quality=level)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, ZLIB_WBITS[method])
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        if data := compress(chunk.encode(encoding)):
+            yield data
+    yield finish()
+
+
+def write_compressed(chunks: Iterable[str], stream: IO[bytes], method: str = "gzip", *,
+                     level: int = COMPRESSION_LEVEL) -> int:
+    """ Writes the compressed chunks to a binary stream, returns the number of written bytes """
+    written = 0
+    for data in compress_chunks(chunks, method, level=level):
+        stream.write(data)
+        written += len(data)
+    return written
@@ -0,0 +1,91 @@
+from typing import IO, Callable, Iterator, Optional
+
+from source.html_cache import FRAGMENT_CACHE, FragmentCache
+from source.html_compiler import PageCompiler
+from source.html_render import HtmlRenderer
+from source.html_utils import HtmlAdapter, PageSpec, Style
+
+
+class GenerationCancelled(Exception):
+    """ Raised by HtmlDocument.update when it is cancelled. The document keeps the sections rendered so far
+        and completes them on the next update
+    """
+
+
+class HtmlDocument:
+    """ A persistent page model: it keeps the rendered fragments of the previous spec,
+        so an update rebuilds only the style block or the sections that have changed
+    """
+
+    def __init__(self, cache: FragmentCache = FRAGMENT_CACHE) -> None:
+        self.spec: Optional[PageSpec] = None
+        self.cache = cache
+        self.style: Optional[Style] = None
+        self.renderer = HtmlRenderer()
+        self.compiler = PageCompiler(self.renderer, cache)
+        self._head = ""
+        self._sections: list[str] = list()
+        self._section_shape: Optional[tuple[int, bool, str]] = None
+        self._tail = ""
+
+    def update(self, spec: PageSpec, *, progress: Optional[Callable[[int, int], None]] = None,
+               cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """ Diffs "spec" against the previous one and returns the number of re-rendered fragments.
+            "progress" receives (rendered sections, all sections), "cancelled" is polled before every section
+        """
+        if not self.compiler.supports(spec):
+            return self._update_page(spec, progress=progress, cancelled=cancelled)
+        style = HtmlAdapter.create_style(color=spec.color, alignment=spec.alignment, bordered=spec.bordered)
+        changed = 0
+        if style != self.style:
+            self._head, self._tail = self.compiler.render_frame(style)
+            self.style = style  # the frame is kept even if the sections are cancelled below
+            changed += 1
+        section_shape = (spec.divs, spec.headers, style.name)
+        if section_shape != self._section_shape:  # every section has to be rebuilt
+            self._sections.clear()
+            self._section_shape = section_shape
+        del self._sections[spec.sections:]
+        for s_num in range(len(self._sections) + 1, spec.sections + 1):
+            if cancelled is not None and cancelled():
+                raise GenerationCancelled(f"cancelled at section {s_num} of {spec.sections}")
+            self._sections.append(self.compiler.section_template(spec.divs, spec.headers, style).fill(s_num))
+            changed += 1
+            if progress is not None:
+                progress(s_num, spec.sections)
+        self.spec = spec
+        return changed
+
+    def _update_page(self, spec: PageSpec, *, progress: Optional[Callable[[int, int], None]] = None,
+                     cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """ The fallback for the specs the compiler does not support: the page is built as a tree
+            and kept as a single fragment, the next update starts from scratch
+        """
+        if cancelled is not None and cancelled():
+            raise GenerationCancelled("cancelled before building the page")
+        adapter = HtmlAdapter()
+        adapter.director.renderer = self.renderer
+        adapter.build_page(spec)
+        self._head, self._tail = adapter.get_html(), ""
+        self._sections.clear()
+        self._section_shape = self.style = None
+        self.spec = spec
+        if progress is not None:
+            progress(spec.sections, spec.sections)
+        return 1
+
+    @property
+    def size(self) -> int:
+        return len(self._head) + sum(map(len, self._sections)) + len(self._tail)
+
+    def iter_html(self) -> Iterator[str]:
+        """ Splices the cached fragments """
+        yield self._head
+        yield from self._sections
+        yield self._tail
+
+    def write_html(self, stream: IO) -> int:
+        return self.renderer.write_chunks(self.iter_html(), stream)
+
+    def get_html(self) -> str:
+        return "".join(self.iter_html())
@@ -0,0 +1,235 @@
+import gc
+from contextlib import contextmanager
+from functools import partial
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+
+from source.html_tags import TagContent, TagFlyweights, SingleTag, HTML_SINGLES, HTML_DOUBLES, HTML_UNIQUES
+from source.html_utils import HtmlBuilder, CompactHtmlBuilder, Node, Leaf, Strategy
+from source.template_io import iter_text_chunks
+
+HTML_TAGS = HTML_SINGLES | HTML_DOUBLES | HTML_UNIQUES
+
+OPEN_NODE, ADD_LEAF, CLOSE_NODE = range(3)
+
+
+class HtmlParseError(ValueError):
+    """ The text can not be represented by the builder tree, or it is not in the layout written by HtmlRenderer """
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """ Building a tree allocates millions of objects without reference cycles,
+        the cyclic collector would otherwise rescan the growing tree again and again
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class HtmlParser:
+    """ Rebuilds the builder tree of a page, so a saved template can be edited and rendered again.
+        The pages written by HtmlRenderer hold one tag or one content string per line: they are parsed by
+        a line tokenizer that tokenizes every distinct tag line once. Any other markup goes through html.parser
+    """
+
+    def __init__(self, *, compact: bool = False, flyweights: Optional[TagFlyweights] = None) -> None:
+        self.compact = compact
+        self.flyweights = flyweights if flyweights is not None else TagFlyweights()
+
+    def new_builder(self) -> HtmlBuilder:
+        return CompactHtmlBuilder(self.flyweights) if self.compact else HtmlBuilder(self.flyweights)
+
+    def parse(self, text: str) -> HtmlBuilder:
+        try:
+            return self.parse_lines(text.splitlines())
+        except HtmlParseError:
+            return self.parse_markup((text,))
+
+    def parse_file(self, path: str) -> HtmlBuilder:
+        try:
+            with open(path, "r", encoding="utf-8") as source:
+                return self.parse_lines(source)
+        except HtmlParseError:
+            return self.parse_markup(iter_text_chunks(path))
+
+    def parse_lines(self, lines: Iterable[str]) -> HtmlBuilder:
+        """ The fast path for the rendered layout, any other line raises HtmlParseError """
+        builder = self.new_builder()
+        with gc_paused():
+            if self.compact:
+                self._build_compact(lines, builder)
+            else:
+                self._build_list(lines, builder)
+        return builder
+
+    def _build_list(self, lines: Iterable[str], builder: HtmlBuilder) -> None:
+        """ Node.add and Leaf.add are inlined: the first item of a node list is its tag, so it checks the closing """
+        tokens: dict[str, tuple] = dict()  # a line with its indentation -> (kind, tag or closing string)
+        get_token, content = tokens.get, TagContent
+        current = builder.branch_ptr
+        stack: list[list] = []
+        push, pop = stack.append, stack.pop
+        for line in lines:
+            token = get_token(line)
+            if token is None:
+                text = line.strip()
+                if not text:
+                    continue
+                if text[0] != "<":
+                    current.append(content(text))  # content strings are unique, they are not memoized
+                    continue
+                token = tokens[line] = self._tokenize(text, builder)
+            kind, value = token
+            if kind == OPEN_NODE:
+                push(current)
+                node = [value]
+                current.append(node)
+                current = node
+            elif kind == ADD_LEAF:
+                current.append(value)
+            else:
+                if not stack:
+                    raise HtmlParseError(f"unexpected closing tag {value}")
+                if current[0].close != value:
+                    raise HtmlParseError(f"expected {current[0].close}, got {value}")
+                current = pop()
+        if stack:
+            raise HtmlParseError(f"unclosed tag, expected {current[0].close}")
+        builder.branch_ptr = current
+
+    def _build_compact(self, lines: Iterable[str], builder: CompactHtmlBuilder) -> None:
+        add_node, add_leaf = partial(Node.add_compact, builder.tree), partial(Leaf.add_compact, builder.tree)
+        tokens: dict[str, tuple] = dict()
+        current = builder.branch_ptr
+        stack: list[tuple[int, str]] = []
+        for line in lines:
+            token = tokens.get(line)
+            if token is None:
+                text = line.strip()
+                if not text:
+                    continue
+                if text[0] != "<":
+                    add_leaf(current, TagContent(text))
+                    continue
+                token = tokens[line] = self._tokenize(text, builder)
+            kind, value = token
+            if kind == OPEN_NODE:
+                stack.append((current, value.close))
+                current = add_node(current, value)
+            elif kind == ADD_LEAF:
+                add_leaf(current, value)
+            else:
+                if not stack:
+                    raise HtmlParseError(f"unexpected closing tag {value}")
+                current, closing = stack.pop()
+                if closing != value:
+                    raise HtmlParseError(f"expected {closing}, got {value}")
+        if stack:
+            raise HtmlParseError(f"unclosed tag, expected {stack[-1][1]}")
+        builder.branch_ptr = current
+
+    @staticmethod
+    def _tokenize(text: str, builder: HtmlBuilder) -> tuple:
+        """ Accepts "<name specs>", "<name specs></name>" and "</name>" lines only """
+        if text.startswith("</"):
+            return CLOSE_NODE, text
+        end = text.find(">")
+        name, _, specs = text[1:end].partition(" ")
+        if name not in HTML_TAGS:
+            raise HtmlParseError(f"unknown tag <{name}>")
+        tag = builder.create_content(name, specs)
+        if end == len(text) - 1:
+            return (ADD_LEAF if isinstance(tag, SingleTag) else OPEN_NODE), tag
+        if text[end + 1:] == tag.close:  # an empty node is rendered as a leaf line
+            return ADD_LEAF, tag
+        raise HtmlParseError(f"not a rendered line: {text!r}")
+
+    def parse_markup(self, chunks: Iterable[str]) -> HtmlBuilder:
+        """ The fallback for hand-written markup. Comments and processing instructions are dropped,
+            every non-blank line of the text becomes a content leaf
+        """
+        handler = _BuilderHandler(self.new_builder())
+        with gc_paused():
+            for chunk in chunks:
+                handler.feed(chunk)
+            handler.close()
+        return handler.builder
+
+
+class _BuilderHandler(HTMLParser):
+    """ Drives the builder from the html.parser events. A start tag is held back until the next event,
+        so an element without children becomes a leaf like the ones HtmlDirector adds
+    """
+
+    def __init__(self, builder: HtmlBuilder) -> None:
+        super().__init__(convert_charrefs=False)  # the references are kept as written
+        self.builder = builder
+        if isinstance(builder, CompactHtmlBuilder):
+            self._add_leaf = partial(Leaf.add_compact, builder.tree)
+        else:
+            self._add_leaf = Leaf.add
+        self._pending: Optional[tuple[str, str]] = None
+        self._text: list[str] = list()
+
+    def handle_decl(self, decl: str) -> None:
+        name, _, specs = decl.partition(" ")
+        self._flush()
+        self._add_tag(f"!{name.upper()}", specs, strategy=Leaf)
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        specs = self.get_starttag_text()[len(tag) + 1:-1].strip()
+        self._flush()
+        if tag in HTML_SINGLES:
+            self._add_tag(tag, specs.rstrip("/").rstrip(), strategy=Leaf)
+        else:
+            self._pending = (tag, specs)
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        self._flush()
+        self._add_tag(tag, self.get_starttag_text()[len(tag) + 1:-2].strip(), strategy=Leaf)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in HTML_SINGLES:
+            return
+        if self._pending is not None and self._pending[0] == tag and not "".join(self._text).strip():
+            name, specs = self._pending
+            self._pending = None
+            self._text.clear()
+            self._add_tag(name, specs, strategy=Leaf)
+            return
+        self._flush()
+        self.builder.to_previous()
+
+    def handle_data(self, data: str) -> None:
+        self._text.append(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self._text.append(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._text.append(f"&#{name};")
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def _add_tag(self, name: str, specs: str, *, strategy: type[Strategy]) -> None:
+        if name not in HTML_TAGS:
+            raise HtmlParseError(f"unknown tag <{name}>")
+        self.builder.add(name, strategy=strategy, specs=specs)
+
+    def _flush(self) -> None:
+        """ Adds the held back start tag as a node and the collected text as content leaves, one per line """
+        if self._pending is not None:
+            name, specs = self._pending
+            self._pending = None
+            self._add_tag(name, specs, strategy=Node)
+        for line in "".join(self._text).splitlines():
+            if text := line.strip():  # a content string is never looked up as a tag name
+                self._add_leaf(self.builder.branch_ptr, TagContent(text))
+        self._text.clear()
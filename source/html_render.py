@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from io import BufferedIOBase, RawIOBase, TextIOBase
+from itertools import islice
+from typing import IO, Any, Iterable, Iterator, Union
+
+from source.html_tags import HtmlTag
+from source.html_tree import CompactTree, NO_NODE
+
+INDENTS_CACHE_DEPTH = 256
+
+
+@dataclass(frozen=True)
+class OutputMode:
+    """ The whitespace around the tags: the indentation of one level and the line end """
+    name: str
+    space_tab: str
+    newline: str
+
+
+PRETTY = OutputMode("pretty", "    ", "\n")
+COMPACT = OutputMode("compact", "", "\n")  # a tag or a content string per line, without indentation
+MINIFIED = OutputMode("minified", "", "")
+
+OUTPUT_MODES = {mode.name: mode for mode in (PRETTY, COMPACT, MINIFIED)}
+
+
+class Indents(dict):
+    """ The indentation strings by level, they are built once instead of multiplying "space_tab" for every line """
+
+    def __init__(self, space_tab: str) -> None:
+        super().__init__()
+        self.space_tab = space_tab
+
+    def __missing__(self, level: int) -> str:
+        indent = self.space_tab * level
+        if level < INDENTS_CACHE_DEPTH:  # the indentation of very deep trees is not kept
+            self[level] = indent
+        return indent
+
+
+class HtmlRenderer:
+    """ This class serializes the html tree in one linear pass, yielding the document by chunks """
+
+    def __init__(self, *, chunk_lines: int = 4096, mode: OutputMode = PRETTY) -> None:
+        self.chunk_lines = chunk_lines
+        self.mode = mode
+        self.space_tab = mode.space_tab
+        self.newline = mode.newline
+        self.indents = Indents(mode.space_tab)
+
+    def iter_lines(self, tree: Union[list[Any], CompactTree], level: int = -1) -> Iterator[str]:
+        """ Yields the document line by line. Both trees are traversed with an explicit stack,
+            so the nesting depth is not limited by the recursion limit
+        """
+        if isinstance(tree, CompactTree):
+            return self._iter_compact_lines(tree, level + 1)
+        return self._iter_list_lines(tree, level)
+
+    def _iter_list_lines(self, tree: list[Union[HtmlTag, Any]], level: int) -> Iterator[str]:
+        """ The first item of every node of the nested lists tree is its own tag. The document root (level -1)
+            has no tag, all of its items are top-level lines
+        """
+        indents, newline = self.indents, self.newline
+        if level < 0:
+            stack = [(None, iter(tree), level)]
+        else:
+            yield indents[level] + tree[0].open + newline
+            stack = [(tree[0], islice(tree, 1, None), level)]
+        while stack:
+            first_tag, children, level = stack[-1]
+            indent = indents[level + 1]
+            for child in children:
+                if isinstance(child, list):
+                    yield indent + child[0].open + newline
+                    stack.append((child[0], islice(child, 1, None), level + 1))
+                    break
+                yield indent + child.open + child.close + newline
+            else:
+                stack.pop()
+                if first_tag is not None and first_tag.close:
+                    yield indents[level] + first_tag.close + newline
+
+    def _iter_compact_lines(self, tree: CompactTree, level: int) -> Iterator[str]:
+        indents, newline = self.indents, self.newline
+        tag_ids, first_children, next_siblings = tree.tag_ids, tree.first_children, tree.next_siblings
+        tags, strings = tree.tags, tree.strings
+        stack: list[int] = []
+        node = first_children[tree.root]
+        while True:
+            while node == NO_NODE:
+                if not stack:
+                    return
+                node = stack.pop()
+                level -= 1
+                yield indents[level] + tags[tag_ids[node]][1] + newline
+                node = next_siblings[node]
+            tag_id = tag_ids[node]
+            if tag_id < 0:
+                yield indents[level] + strings[~tag_id] + newline
+                node = next_siblings[node]
+                continue
+            open_tag, close_tag = tags[tag_id]
+            yield indents[level] + open_tag + newline
+            if close_tag:
+                stack.append(node)
+                level += 1
+                node = first_children[node]
+            else:
+                node = next_siblings[node]
+
+    def iter_html(self, tree: Union[list[Any], CompactTree]) -> Iterator[str]:
+        """ Joins lines into chunks of "chunk_lines" lines, so the consumer never holds the whole document """
+        chunk: list[str] = []
+        for line in self.iter_lines(tree):
+            chunk.append(line)
+            if len(chunk) >= self.chunk_lines:
+                yield "".join(chunk)
+                chunk.clear()
+        if chunk:
+            yield "".join(chunk)
+
+    def write_html(self, tree: Union[list[Any], CompactTree], stream: IO, *, encoding: str = "utf-8") -> int:
+        """ Writes the document to a text or binary file-like object, returns the number of written units """
+        return self.write_chunks(self.iter_html(tree), stream, encoding=encoding)
+
+    def write_chunks(self, chunks: Iterable[str], stream: IO, *, encoding: str = "utf-8") -> int:
+        written = 0
+        binary = self._is_binary(stream)
+        for chunk in chunks:
+            data = chunk.encode(encoding) if binary else chunk
+            stream.write(data)
+            written += len(data)
+        return written
+
+    @staticmethod
+    def _is_binary(stream: IO) -> bool:
+        if isinstance(stream, TextIOBase):
+            return False
+        if isinstance(stream, (RawIOBase, BufferedIOBase)):
+            return True
+        return "b" in getattr(stream, "mode", "")
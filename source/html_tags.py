@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from itertools import cycle, repeat
-from typing import Iterator
+from functools import lru_cache
+from weakref import WeakValueDictionary
 
 HTML_SINGLES = {'!DOCTYPE', 'area', 'base', 'br', 'col', 'command', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
                 'meta', 'param', 'source', 'track', 'wbr'}
@@ -16,44 +16,85 @@ HTML_DOUBLES = {"a", "abbr", "address", "article", "aside", "audio", "b", "bdi",
 
 HTML_UNIQUES = {"html", "head", "body", "header", "main", "footer"}
 
+TAG_STRINGS_CACHE_SIZE = 4096
+
 
 class HtmlTag(ABC):
+    """ Tags are immutable: the opening and closing strings are computed once, so a tree can be rendered many times
+        and from many threads at once
+    """
+    __slots__ = ("_tag_name", "_tag_specs", "open", "close", "__weakref__")
+
     def __init__(self, tag_name: str, *, tag_specs: str = ""):
         self._tag_name = tag_name
         self._tag_specs = tag_specs
-        self._tag_iter = self._get_tag_gen()
+        self.open, self.close = self._get_tag_strings(tag_name, tag_specs)
 
     def __repr__(self):
         return f"{type(self).__name__}({self._tag_name})"
 
+    @staticmethod
     @abstractmethod
-    def _get_tag_gen(self) -> Iterator: ...
+    def _get_tag_strings(tag_name: str, tag_specs: str) -> tuple[str, str]: ...
 
     @property
     def tag(self) -> str:
-        return next(self._tag_iter)
+        return self.open
 
 
 class SingleTag(HtmlTag):
-    def _get_tag_gen(self) -> Iterator:
-        return repeat(f"<{self._tag_name}{' ' * bool(self._tag_specs)}{self._tag_specs}>")
+    __slots__ = ()
+
+    @staticmethod
+    @lru_cache(maxsize=TAG_STRINGS_CACHE_SIZE)  # the interning table of (name, specs) pairs
+    def _get_tag_strings(tag_name: str, tag_specs: str) -> tuple[str, str]:
+        return f"<{tag_name}{' ' * bool(tag_specs)}{tag_specs}>", ""
 
 
 class DoubleTag(HtmlTag):
-    def _get_tag_gen(self) -> Iterator:
-        return cycle((f"<{self._tag_name}{' ' * bool(self._tag_specs)}{self._tag_specs}>", f"</{self._tag_name}>"))
+    __slots__ = ()
 
+    @staticmethod
+    @lru_cache(maxsize=TAG_STRINGS_CACHE_SIZE)
+    def _get_tag_strings(tag_name: str, tag_specs: str) -> tuple[str, str]:
+        return f"<{tag_name}{' ' * bool(tag_specs)}{tag_specs}>", f"</{tag_name}>"
 
-# flyweight
-class UniqueTag(DoubleTag):
-    """ This class is used to implement "flyweight" pattern """
-    __instances: dict[str, HtmlTag] = dict()
 
-    def __new__(cls, tag_name: str, *args, **kwargs):
-        return cls.__instances.setdefault(tag_name, super().__new__(cls))
+class UniqueTag(DoubleTag):
+    """ The tags that appear once per document, they are shared through TagFlyweights like any other tag """
+    __slots__ = ()
 
 
 class TagContent(SingleTag):
+    __slots__ = ()
 
-    def _get_tag_gen(self) -> Iterator:
-        return repeat(self._tag_name)
+    def __init__(self, tag_name: str, *, tag_specs: str = ""):
+        self._tag_name = self.open = tag_name  # a parsed page creates one per content line, the call is inlined
+        self._tag_specs = tag_specs
+        self.close = ""
+
+    @staticmethod
+    def _get_tag_strings(tag_name: str, tag_specs: str) -> tuple[str, str]:
+        return tag_name, ""
+
+
+# flyweight
+class TagFlyweights:
+    """ This class is used to implement "flyweight" pattern.
+        It is a scope (one per builder by default) that shares one immutable tag object per (type, name, specs).
+        Tags are held by weak references, so the scope never outlives the trees that use its tags.
+        Concurrent lookups may at worst create equal tags twice, which is harmless for immutable tags
+    """
+
+    def __init__(self) -> None:
+        self._tags: WeakValueDictionary[tuple[type[HtmlTag], str, str], HtmlTag] = WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def get(self, tag_type: type[HtmlTag], tag_name: str, tag_specs: str = "") -> HtmlTag:
+        key = (tag_type, tag_name, tag_specs)
+        tag = self._tags.get(key)
+        if tag is None:
+            tag = self._tags.setdefault(key, tag_type(tag_name, tag_specs=tag_specs))
+        return tag
@@ -0,0 +1,104 @@
+from array import array
+from typing import Iterator, Optional
+
+from source.html_tags import HtmlTag, TagContent
+
+NO_NODE = -1
+
+
+class CompactTree:
+    """ This class stores the html tree in flat parallel arrays instead of nested lists of tag objects.
+        Every node is an index: "tag_ids" points either to the interned (open, close) pair of a tag
+        (non-negative id) or to the interned content string (negative id, "~tag_id" is the string index).
+        Only the nodes with a non-empty closing tag have children, the virtual root has index 0
+    """
+    __slots__ = ("tag_ids", "parents", "first_children", "next_siblings", "last_children", "tags", "strings",
+                 "_tag_index", "_string_index")
+
+    root = 0
+
+    def __init__(self) -> None:
+        self.tag_ids = array("i", (0,))
+        self.parents = array("i", (NO_NODE,))
+        self.first_children = array("i", (NO_NODE,))
+        self.next_siblings = array("i", (NO_NODE,))
+        self.last_children = array("i", (NO_NODE,))
+        self.tags: list[tuple[str, str]] = [("", "")]
+        self.strings: list[str] = list()
+        self._tag_index: dict[tuple[HtmlTag, bool], int] = dict()  # keeps the flyweight tags alive
+        self._string_index: dict[str, int] = dict()
+
+    def __len__(self) -> int:
+        return len(self.tag_ids)
+
+    def append(self, parent: int, value: HtmlTag, *, branch: bool) -> int:
+        """ Adds "value" as the last child of "parent" and returns the index of the new node """
+        node = len(self.tag_ids)
+        self.tag_ids.append(self._intern(value, branch))
+        self.parents.append(parent)
+        self.first_children.append(NO_NODE)
+        self.next_siblings.append(NO_NODE)
+        self.last_children.append(NO_NODE)
+        last_child = self.last_children[parent]
+        if last_child == NO_NODE:
+            self.first_children[parent] = node
+        else:
+            self.next_siblings[last_child] = node
+        self.last_children[parent] = node
+        return node
+
+    def _intern(self, value: HtmlTag, branch: bool) -> int:
+        if isinstance(value, TagContent):
+            return ~self._intern_item(self._string_index, self.strings, value.open, value.open)
+        pair = (value.open, value.close) if branch else (value.open + value.close, "")  # a leaf takes one line
+        return self._intern_item(self._tag_index, self.tags, (value, branch), pair)
+
+    @staticmethod
+    def _intern_item(index: dict, table: list, key, item) -> int:
+        item_id = index.setdefault(key, len(table))
+        if item_id == len(table):
+            table.append(item)
+        return item_id
+
+    def node(self, index: int = root) -> "CompactNode":
+        return CompactNode(self, index)
+
+
+class CompactNode:
+    """ A lightweight view of one node of the CompactTree """
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: CompactTree, index: int) -> None:
+        self.tree = tree
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.text!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CompactNode) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    @property
+    def is_branch(self) -> bool:
+        tag_id = self.tree.tag_ids[self.index]
+        return tag_id >= 0 and bool(self.tree.tags[tag_id][1])
+
+    @property
+    def text(self) -> str:
+        tag_id = self.tree.tag_ids[self.index]
+        return self.tree.strings[~tag_id] if tag_id < 0 else self.tree.tags[tag_id][0]
+
+    @property
+    def parent(self) -> Optional["CompactNode"]:
+        parent = self.tree.parents[self.index]
+        return None if parent == NO_NODE else CompactNode(self.tree, parent)
+
+    @property
+    def children(self) -> Iterator["CompactNode"]:
+        child = self.tree.first_children[self.index]
+        while child != NO_NODE:
+            yield CompactNode(self.tree, child)
+            child = self.tree.next_siblings[child]
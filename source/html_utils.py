@@ -1,18 +1,17 @@
-from abc import ABC, ABCMeta, abstractmethod
+import re
+from abc import ABC, abstractmethod
 from collections import deque
 from dataclasses import dataclass
-from typing import Any, Union
+from hashlib import blake2b
+from typing import IO, Any, Iterator, Optional, Sequence, Union
 
-from PySide6.QtCore import QObject
+from source.html_render import HtmlRenderer, OutputMode, PRETTY
+from source.html_tree import CompactTree
+from source.html_tags import HtmlTag, DoubleTag, SingleTag, UniqueTag, TagContent, TagFlyweights, HTML_SINGLES, \
+    HTML_DOUBLES, HTML_UNIQUES
 
-from source.html_tags import HtmlTag, DoubleTag, SingleTag, UniqueTag, TagContent, HTML_SINGLES, HTML_DOUBLES, \
-    HTML_UNIQUES
 
-
-class _ABCQObjectMeta(type(QObject), ABCMeta): ...
-
-
-class HtmlWidget(QObject, ABC, metaclass=_ABCQObjectMeta):
+class HtmlWidget(ABC):
     @property
     @abstractmethod
     def sections(self) -> int: ...
@@ -44,31 +43,139 @@ class Style:
     body: str
 
 
+@dataclass(frozen=True)
+class StyleVariant:
+    """ The look of a div, the variants of a page are turned into classes by StyleRegistry """
+    color: str = "black"
+    alignment: str = "left"
+    bordered: bool = False
+
+    @property
+    def declarations(self) -> str:
+        declarations = ""
+        if self.color:
+            declarations += f"color: {self.color}; "
+        if self.alignment:
+            declarations += f"text-align: {self.alignment}; "
+        if self.bordered:
+            declarations += "border: 1px solid black; "
+        return declarations
+
+
+class StyleRegistry:
+    """ Interns the rule bodies: the variants with equal declarations share one class.
+        The classes are named by the registration order in base 36 ("v0" ... "vz", "v10" ...)
+    """
+
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+    def __init__(self, prefix: str = "v") -> None:
+        self.prefix = prefix
+        self._styles: dict[str, Style] = dict()
+
+    def __len__(self) -> int:
+        return len(self._styles)
+
+    def register(self, variant: StyleVariant) -> Style:
+        declarations = variant.declarations
+        style = self._styles.get(declarations)
+        if style is None:
+            name = self.prefix + self._base36(len(self._styles))
+            style = self._styles[declarations] = Style(name, f".{name} {{{declarations}}}")
+        return style
+
+    @property
+    def styles(self) -> list[Style]:
+        return list(self._styles.values())
+
+    @classmethod
+    def _base36(cls, number: int) -> str:
+        digits = ""
+        while True:
+            number, digit = divmod(number, len(cls.digits))
+            digits = cls.digits[digit] + digits
+            if not number:
+                return digits
+
+
+PAGE_FILE_NAME = re.compile(r"(?P<color>\w*?)_(?P<alignment>[a-z]*)(?P<headers>_headers)?(?P<borders>_borders)?"
+                            r"\((?P<sections>\d+)-(?P<divs>\d+)\)\.html")
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    """ A plain description of the page, it can be passed to HtmlAdapter.build_page instead of a widget """
+    sections: int = 1
+    divs: int = 1
+    bordered: bool = False
+    headers: bool = False
+    color: str = "black"
+    alignment: str = "left"
+    variants: tuple[StyleVariant, ...] = ()  # cycled over the divs of the page instead of the single style
+    section_variants: bool = False  # cycle the variants over the sections, all divs of a section look the same
+
+    @classmethod
+    def from_widget(cls, obj: HtmlWidget) -> "PageSpec":
+        """ Takes a snapshot of the widget state """
+        return cls(sections=obj.sections, divs=obj.divs, bordered=obj.bordered, headers=obj.headers,
+                   color=obj.color, alignment=obj.alignment)
+
+    @property
+    def file_name(self) -> str:
+        """ The naming of the bundled templates, e.g. "blue_left_headers_borders(2-6).html".
+            The variants are named by a digest, e.g. "black_left_variants-1f3a9c2e(2-6).html"
+        """
+        name = f"{self.color}_{self.alignment}"
+        if self.headers:
+            name += "_headers"
+        if self.bordered:
+            name += "_borders"
+        if self.variants:
+            name += f"_variants-{self.variants_digest}"
+        return f"{name}({self.sections}-{self.divs}).html"
+
+    @property
+    def variants_digest(self) -> str:
+        """ Stable across processes, unlike hash() of the strings """
+        return blake2b(repr((self.variants, self.section_variants)).encode(), digest_size=4).hexdigest()
+
+    @classmethod
+    def from_file_name(cls, file_name: str) -> Optional["PageSpec"]:
+        if (match := PAGE_FILE_NAME.fullmatch(file_name)) is None:
+            return None
+        return cls(sections=int(match["sections"]), divs=int(match["divs"]), bordered=bool(match["borders"]),
+                   headers=bool(match["headers"]), color=match["color"], alignment=match["alignment"])
+
+
 class HtmlAdapter:
     """ This class is used to implement the "adapter" pattern"""
 
-    def __init__(self) -> None:
-        self.director = HtmlDirector()
+    def __init__(self, *, compact: bool = False, mode: OutputMode = PRETTY) -> None:
+        self.director = HtmlDirector(CompactHtmlBuilder() if compact else HtmlBuilder(), HtmlRenderer(mode=mode))
 
-    def build_page(self, obj: HtmlWidget) -> None:
-        style = self.create_style(color=obj.color, alignment=obj.alignment, bordered=obj.bordered)
-        self.director.build_tree(sections_num=obj.sections, divs_num=obj.divs, div_style=style,
-                                 headers=obj.headers)
+    def build_page(self, obj: Union[HtmlWidget, PageSpec]) -> None:
+        spec = obj if isinstance(obj, PageSpec) else PageSpec.from_widget(obj)
+        if spec.variants:
+            registry = StyleRegistry()
+            div_style = [registry.register(variant) for variant in spec.variants]
+        else:
+            div_style = self.create_style(color=spec.color, alignment=spec.alignment, bordered=spec.bordered)
+        self.director.build_tree(sections_num=spec.sections, divs_num=spec.divs, div_style=div_style,
+                                 headers=spec.headers, section_variants=spec.section_variants)
 
     def get_html(self) -> str:
         return self.director.get_html()
 
+    def iter_html(self) -> Iterator[str]:
+        return self.director.iter_html()
+
+    def write_html(self, stream: IO) -> int:
+        return self.director.write_html(stream)
+
     @staticmethod
     def create_style(*, color: str, alignment: str, bordered: bool, name: str = "container") -> "Style":
-        style = f".{name} {{"
-        if color:
-            style += f"color: {color}; "
-        if alignment:
-            style += f"text-align: {alignment}; "
-        if bordered:
-            style += "border: 1px solid black; "
-        style += "}"
-        return Style(name, style)
+        declarations = StyleVariant(color=color, alignment=alignment, bordered=bordered).declarations
+        return Style(name, f".{name} {{{declarations}}}")
 
 
 class Strategy(ABC):
@@ -79,6 +186,11 @@ class Strategy(ABC):
     def add(node: list[Any], value: HtmlTag) -> list[Any]:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def add_compact(tree: CompactTree, node: int, value: HtmlTag) -> int:
+        pass
+
 
 class Node(Strategy):
     @staticmethod
@@ -90,6 +202,13 @@ class Node(Strategy):
         else:
             return Leaf.add(node, value)
 
+    @staticmethod
+    def add_compact(tree: CompactTree, node: int, value: HtmlTag) -> int:
+        if isinstance(value, DoubleTag):
+            return tree.append(node, value, branch=True)
+        else:
+            return Leaf.add_compact(tree, node, value)
+
 
 class Leaf(Strategy):
     @staticmethod
@@ -97,6 +216,11 @@ class Leaf(Strategy):
         node.append(value)
         return node
 
+    @staticmethod
+    def add_compact(tree: CompactTree, node: int, value: HtmlTag) -> int:
+        tree.append(node, value, branch=False)
+        return node
+
 
 class HtmlBuilder:
     """ This class is used to implement those patterns:
@@ -106,10 +230,11 @@ class HtmlBuilder:
         - state
     """
 
-    def __init__(self) -> None:
+    def __init__(self, flyweights: Optional[TagFlyweights] = None) -> None:
         self.tree: list[Any] = list()
         self.branch_ptr: list[Any] = self.tree
         self.node_stack: deque = deque()
+        self.flyweights = flyweights if flyweights is not None else TagFlyweights()
 
     def add(self, value: str, *, strategy: type[Strategy], specs: str = "") -> None:
         """ Implements a part of "strategy" pattern"""
@@ -117,83 +242,114 @@ class HtmlBuilder:
         content = self.create_content(value, specs)  # a part of "factory method" pattern
         self.branch_ptr = strategy.add(self.branch_ptr, content)
 
-    @staticmethod
-    def create_content(value: str, specs: str) -> HtmlTag:
-        """ Implements "factory method" pattern"""
+    def create_content(self, value: str, specs: str) -> HtmlTag:
+        """ Implements "factory method" pattern, the tags are shared within the builder's flyweights scope"""
         if value in HTML_SINGLES:
-            return SingleTag(value, tag_specs=specs)
+            return self.flyweights.get(SingleTag, value, specs)
         elif value in HTML_DOUBLES:
-            return DoubleTag(value, tag_specs=specs)
+            return self.flyweights.get(DoubleTag, value, specs)
         elif value in HTML_UNIQUES:
-            return UniqueTag(value, tag_specs=specs)
+            return self.flyweights.get(UniqueTag, value, specs)
         else:
             return TagContent(value)
 
     def to_previous(self) -> "HtmlBuilder":
         """ Implements "state" pattern - we can return to previous state using node callstack"""
-        if self.node_stack:
+        while self.node_stack:
             last_branch = self.node_stack.pop()
-            if last_branch is self.branch_ptr:
-                self.to_previous()  # recursive call
-            else:
+            if last_branch is not self.branch_ptr:  # skip the states pushed by leaves of the current branch
                 self.branch_ptr = last_branch
-            if not self.node_stack:
-                self.node_stack.append(self.branch_ptr)
+                break
+        if not self.node_stack:
+            self.node_stack.append(self.branch_ptr)
         return self
 
     def get_result(self):
         return self.tree
 
 
-class HtmlDirector:
-    def __init__(self) -> None:
-        self.html_builder = HtmlBuilder()
+class CompactHtmlBuilder(HtmlBuilder):
+    """ Builds the same document into a flat array-backed CompactTree.
+        The parent of every node is stored in the tree, so there is no need in the node callstack
+    """
+
+    def __init__(self, flyweights: Optional[TagFlyweights] = None) -> None:
+        self.tree: CompactTree = CompactTree()
+        self.branch_ptr: int = self.tree.root
+        self.flyweights = flyweights if flyweights is not None else TagFlyweights()
+
+    def add(self, value: str, *, strategy: type[Strategy], specs: str = "") -> None:
+        content = self.create_content(value, specs)
+        self.branch_ptr = strategy.add_compact(self.tree, self.branch_ptr, content)
 
-    def build_tree(self, *, sections_num: int, divs_num: int, div_style: Style, headers: bool) -> None:
+    def to_previous(self) -> "CompactHtmlBuilder":
+        if self.branch_ptr != self.tree.root:
+            self.branch_ptr = self.tree.parents[self.branch_ptr]
+        return self
+
+
+class HtmlDirector:
+    def __init__(self, html_builder: Optional[HtmlBuilder] = None, renderer: Optional[HtmlRenderer] = None) -> None:
+        self.html_builder = html_builder or HtmlBuilder()
+        self.renderer = renderer or HtmlRenderer()
+
+    def build_tree(self, *, sections_num: int, divs_num: int, div_style: Union[Style, Sequence[Style]],
+                   headers: bool, section_variants: bool = False) -> None:
+        """ A sequence of styles is cycled over the divs of the page, or over its sections if "section_variants" """
+        styles = (div_style,) if isinstance(div_style, Style) else tuple(div_style)
+        self.build_head(styles)
+        for s_num in range(1, sections_num + 1):
+            if section_variants:
+                section_styles = styles[(s_num - 1) % len(styles)]
+            else:
+                offset = (s_num - 1) * divs_num % len(styles)
+                section_styles = styles[offset:] + styles[:offset]
+            self.build_section(s_num, divs_num=divs_num, div_style=section_styles, headers=headers)
+        self.build_footer()
+
+    def build_head(self, div_style: Union[Style, Sequence[Style]]) -> None:
+        """ Builds the page up to the opening of "main", the builder is left inside "main".
+            The style block holds one rule per distinct class
+        """
+        styles = (div_style,) if isinstance(div_style, Style) else div_style
         self.html_builder.add("!DOCTYPE", strategy=Leaf, specs="html")
         self.html_builder.add("html", strategy=Node)
         self.html_builder.add("head", strategy=Node)
         self.html_builder.add("style", strategy=Node, specs='type="text/css"')
-        self.html_builder.add(div_style.body, strategy=Leaf)
+        for body in dict.fromkeys(style.body for style in styles):
+            self.html_builder.add(body, strategy=Leaf)
         self.html_builder.to_previous().to_previous()
         self.html_builder.add("body", strategy=Node)
         self.html_builder.add("header", strategy=Leaf)
         self.html_builder.add("main", strategy=Node)
-        for s_num in range(1, sections_num + 1):
-            self.html_builder.add("section", strategy=Node)
-            for d_num in range(1, divs_num + 1):
-                self.html_builder.add("div", strategy=Node, specs=f"class={div_style.name}")
-                if headers:
-                    h_level = d_num if d_num <= 6 else 6
-                    self.html_builder.add(f"h{h_level}", strategy=Node)
-                    self.html_builder.add(f"section-{s_num} div-{d_num} message", strategy=Leaf)
-                    self.html_builder.to_previous()
-                else:
-                    self.html_builder.add(f"section-{s_num} div-{d_num} message", strategy=Leaf)
+
+    def build_section(self, s_num: Union[int, str], *, divs_num: int, div_style: Union[Style, Sequence[Style]],
+                      headers: bool) -> None:
+        """ A sequence of styles is cycled over the divs of the section """
+        styles = (div_style,) if isinstance(div_style, Style) else div_style
+        self.html_builder.add("section", strategy=Node)
+        for d_num in range(1, divs_num + 1):
+            style = styles[(d_num - 1) % len(styles)]
+            self.html_builder.add("div", strategy=Node, specs=f"class={style.name}")
+            if headers:
+                h_level = d_num if d_num <= 6 else 6
+                self.html_builder.add(f"h{h_level}", strategy=Node)
+                self.html_builder.add(f"section-{s_num} div-{d_num} message", strategy=Leaf)
                 self.html_builder.to_previous()
+            else:
+                self.html_builder.add(f"section-{s_num} div-{d_num} message", strategy=Leaf)
             self.html_builder.to_previous()
         self.html_builder.to_previous()
+
+    def build_footer(self) -> None:
+        self.html_builder.to_previous()
         self.html_builder.add("footer", strategy=Leaf)
 
+    def iter_html(self) -> Iterator[str]:
+        return self.renderer.iter_html(self.html_builder.get_result())
+
+    def write_html(self, stream: IO) -> int:
+        return self.renderer.write_html(self.html_builder.get_result(), stream)
+
     def get_html(self) -> str:
-        res = ""
-        space_tab = "    "
-
-        def tree_traversal(node: list[Union[HtmlTag, Any]], level: int = -1) -> None:
-            """ It's a function that traverses the html tree recursively to write result to nonlocal "res" variable """
-            nonlocal res
-            first_tag = node[0]
-            res += space_tab * level + first_tag.tag + '\n'
-            for child in node[1:]:
-                match child:
-                    case SingleTag():
-                        res += space_tab * (level + 1) + child.tag + '\n'
-                    case DoubleTag():
-                        res += space_tab * (level + 1) + child.tag + child.tag + '\n'
-                    case list():
-                        tree_traversal(child, level + 1)  # recursive case
-            if isinstance(first_tag, DoubleTag):
-                res += space_tab * level + first_tag.tag + '\n'
-
-        tree_traversal(self.html_builder.tree)
-        return res
+        return "".join(self.iter_html())
@@ -0,0 +1,66 @@
+import os
+from tempfile import NamedTemporaryFile
+from typing import Generator, Iterable, Optional
+
+from source.template_io import iter_text_chunks, load_text
+
+LAZY_THRESHOLD = 2 ** 20  # bigger documents are previewed from a file and loaded into the text pane by chunks
+CHUNK_SIZE = 256 * 2 ** 10
+
+
+class PreviewSource:
+    """ The full text behind the preview panes: an in-memory string or a file on disk.
+        Temporary files created by the source are removed by "close"
+    """
+
+    def __init__(self, *, text: Optional[str] = None, path: Optional[str] = None, temporary: bool = False) -> None:
+        self.text = text
+        self.path = path
+        self._temporary = temporary
+
+    @classmethod
+    def from_text(cls, text: str) -> "PreviewSource":
+        return cls(text=text)
+
+    @classmethod
+    def from_file(cls, path: str) -> "PreviewSource":
+        if os.path.getsize(path) > LAZY_THRESHOLD:
+            return cls(path=path)
+        return cls(text=load_text(path))
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str], size: int) -> "PreviewSource":
+        """ Small documents are joined, big ones are streamed to a temporary file without building the string """
+        if size <= LAZY_THRESHOLD:
+            return cls(text="".join(chunks))
+        with NamedTemporaryFile("w", encoding="utf-8", suffix=".html", delete=False) as output:
+            output.writelines(chunks)
+        return cls(path=output.name, temporary=True)
+
+    @property
+    def size(self) -> int:
+        return len(self.text) if self.text is not None else os.path.getsize(self.path)
+
+    @property
+    def is_lazy(self) -> bool:
+        return self.text is None
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Generator[str, None, None]:
+        if self.text is not None:
+            for start in range(0, len(self.text), chunk_size):
+                yield self.text[start:start + chunk_size]
+            return
+        yield from iter_text_chunks(self.path, chunk_size=chunk_size)
+
+    def to_file(self) -> str:
+        """ A path for the render view, the in-memory text is written to a temporary file once """
+        if self.path is None:
+            with NamedTemporaryFile("w", encoding="utf-8", suffix=".html", delete=False) as output:
+                output.write(self.text)
+            self.path, self._temporary = output.name, True
+        return self.path
+
+    def close(self) -> None:
+        if self._temporary and self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path, self._temporary = None, False
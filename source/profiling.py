@@ -0,0 +1,142 @@
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import IO, Iterable, Iterator, Optional
+
+from source.html_compiler import page_compiler
+from source.html_compress import compress_chunks, write_compressed
+from source.html_render import HtmlRenderer, OutputMode, PRETTY
+from source.html_tags import TagFlyweights
+from source.html_utils import HtmlAdapter, HtmlBuilder, PageSpec, Strategy
+
+
+@dataclass
+class PipelineStats:
+    """ Wall time of the pipeline stages, calls of the instrumented methods, the built nodes, the emitted bytes
+        and the peak of the traced allocations (None if the memory was not traced)
+    """
+    stages: dict[str, float] = field(default_factory=dict)
+    calls: dict[str, int] = field(default_factory=dict)
+    nodes: int = 0
+    bytes: int = 0
+    peak_memory: Optional[int] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float, calls: int = 0) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if calls:
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    def __str__(self) -> str:
+        parts = [f"{name} {seconds * 1000:.1f} ms" + (f" ({self.calls[name]:,} calls)" if name in self.calls else "")
+                 for name, seconds in self.stages.items()]
+        if self.nodes:
+            parts.append(f"{self.nodes:,} nodes")
+        parts.append(f"{self.bytes / 2 ** 20:.2f} MB")
+        if self.peak_memory is not None:
+            parts.append(f"peak memory {self.peak_memory / 2 ** 20:.1f} MB")
+        return ", ".join(parts)
+
+
+class ProfilingBuilder(HtmlBuilder):
+    """ Times every "add" and "to_previous" call. It is only created by profile_page,
+        so the regular builder does not pay for the instrumentation
+    """
+
+    def __init__(self, stats: PipelineStats, flyweights: Optional[TagFlyweights] = None) -> None:
+        super().__init__(flyweights)
+        self.stats = stats
+        self._add_time = self._to_previous_time = 0.0
+        self._add_calls = self._to_previous_calls = 0
+
+    def add(self, value: str, *, strategy: type[Strategy], specs: str = "") -> None:
+        start = perf_counter()
+        super().add(value, strategy=strategy, specs=specs)
+        self._add_time += perf_counter() - start
+        self._add_calls += 1
+
+    def to_previous(self) -> "ProfilingBuilder":
+        start = perf_counter()
+        super().to_previous()
+        self._to_previous_time += perf_counter() - start
+        self._to_previous_calls += 1
+        return self
+
+    def flush_stats(self) -> None:
+        self.stats.add_time("HtmlBuilder.add", self._add_time, self._add_calls)
+        self.stats.add_time("HtmlBuilder.to_previous", self._to_previous_time, self._to_previous_calls)
+        self.stats.nodes += self._add_calls
+
+
+@contextmanager
+def traced_memory(stats: PipelineStats, enabled: bool = True) -> Iterator[None]:
+    """ Records the allocation peak with tracemalloc, a trace started by somebody else is left running """
+    if not enabled:
+        yield
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+
+
+def profile_page(spec: PageSpec, stream: Optional[IO] = None, *, compiled: bool = True, mode: OutputMode = PRETTY,
+                 compression: Optional[str] = None, trace_memory: bool = True) -> PipelineStats:
+    """ Produces the page like generate.write_page, recording the stages. Without a stream the page is discarded """
+    stats = PipelineStats()
+    renderer = HtmlRenderer(mode=mode)
+    with traced_memory(stats, trace_memory):
+        if compiled and page_compiler(mode).supports(spec):
+            with stats.stage("PageCompiler.compile"):
+                page = page_compiler(mode).compile(spec)
+            chunks = page.iter_html(spec.sections)
+        else:
+            adapter = HtmlAdapter(mode=mode)
+            builder = adapter.director.html_builder = ProfilingBuilder(stats)
+            with stats.stage("HtmlAdapter.build_page"):
+                adapter.build_page(spec)
+            builder.flush_stats()
+            chunks = adapter.iter_html()
+        with stats.stage("render"):
+            stats.bytes = _write(chunks, stream, renderer, compression)
+    return stats
+
+
+def _write(chunks: Iterable[str], stream: Optional[IO], renderer: HtmlRenderer, compression: Optional[str]) -> int:
+    if stream is None:
+        if compression is not None:
+            return sum(map(len, compress_chunks(chunks, compression)))
+        return sum(len(chunk.encode()) for chunk in chunks)
+    if compression is not None:
+        return write_compressed(chunks, stream, compression)
+    return renderer.write_chunks(chunks, stream)
+
+
+@contextmanager
+def cprofiled(path: Optional[str]) -> Iterator[None]:
+    """ Runs the block under cProfile and dumps the stats to "path" for pstats or snakeviz, no-op without a path """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
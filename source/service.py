@@ -0,0 +1,269 @@
+""" A local HTTP service generating pages with the same code as the application, it never imports PySide6:
+
+    python -m source.service [--host 127.0.0.1] [--port 8765] [--workers N] [--cache-mb N]
+
+    GET /page?sections=2&divs=6&color=blue&bordered=1&mode=compact  or  POST /page with a JSON object of PageSpec fields
+    GET /stats  the counters of the service and of its page cache as JSON
+
+    The pages are built in a thread pool. Identical requests in flight share one build, the built pages are kept in
+    an LRU cache keyed by the normalized spec and answered with an ETag, "If-None-Match" gets a 304 without a build.
+    Pages of more than "stream_divs" divs are not cached, they are streamed from the renderer with chunked encoding
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from hashlib import blake2b
+from typing import Iterator, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from source.batch import parse_spec
+from source.generate import iter_page
+from source.html_cache import LRUCache
+from source.html_render import OUTPUT_MODES, OutputMode, PRETTY
+from source.html_utils import PageSpec
+
+DEFAULT_PORT = 8765
+PAGE_CACHE_BYTES = 256 * 2 ** 20
+STREAM_DIVS = 50_000  # about 5 MB of pretty html
+MAX_PAGE_DIVS = 10_000_000
+MAX_BODY_BYTES = 2 ** 20
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large"}
+
+PageKey = tuple[PageSpec, str]
+
+
+class RequestError(ValueError):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict[str, str]  # the names are lowercase
+    body: bytes = b""
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    builds: int = 0
+    coalesced: int = 0
+    not_modified: int = 0
+    streamed: int = 0
+    errors: int = 0
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """ Reads one HTTP/1.1 request, None when the client has closed the connection """
+    try:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode("latin-1").split()
+        headers = dict()
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+    except ValueError:  # a line over the stream limit is a ValueError too
+        raise RequestError(400, "malformed request") from None
+    if length < 0:
+        raise RequestError(400, "malformed request")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "the request body is too large")
+    url = urlsplit(target)
+    return Request(method, url.path, dict(parse_qsl(url.query)), headers, await reader.readexactly(length))
+
+
+class PageService:
+    """ Serves the pages over asyncio streams, the builds run in "executor" """
+
+    def __init__(self, executor: Optional[Executor] = None, *, cache_bytes: int = PAGE_CACHE_BYTES,
+                 stream_divs: int = STREAM_DIVS) -> None:
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="page-service")
+        self.cache: LRUCache[bytes] = LRUCache(cache_bytes, sizeof=len)
+        self.stream_divs = stream_divs
+        self.stats = ServiceStats()
+        self._in_flight: dict[PageKey, asyncio.Future] = dict()
+        self._etag_salt = os.urandom(8)  # the ETags are valid for the lifetime of the service
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Answers the requests of a keep-alive connection one by one """
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except RequestError as error:
+                    await self.send_error(writer, error, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                self.stats.requests += 1
+                try:
+                    await self.respond(request, writer)
+                except RequestError as error:
+                    await self.send_error(writer, error, keep_alive=request.keep_alive)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        if request.path == "/stats":
+            body = json.dumps(dict(asdict(self.stats), cache=asdict(self.cache.stats))).encode()
+            return await self.send(writer, 200, body, {"Content-Type": "application/json"}, request.keep_alive)
+        if request.path != "/page":
+            raise RequestError(404, f"unknown path {request.path}")
+        if request.method not in ("GET", "POST"):
+            raise RequestError(405, f"{request.method} is not allowed")
+        key = self.page_key(request)
+        headers = {"Content-Type": "text/html; charset=utf-8", "ETag": self.etag(key), "Cache-Control": "no-cache"}
+        if request.method == "GET" and self.not_modified(request, headers["ETag"]):
+            self.stats.not_modified += 1
+            return await self.send(writer, 304, b"", headers, request.keep_alive)
+        spec, _ = key
+        if spec.sections * max(spec.divs, 1) > self.stream_divs:
+            self.stats.streamed += 1
+            return await self.stream(writer, key, headers, request.keep_alive)
+        await self.send(writer, 200, await self.get_page(key), headers, request.keep_alive)
+
+    @staticmethod
+    def page_key(request: Request) -> PageKey:
+        """ The normalized spec and the output mode, equal pages get equal keys whatever the spelling of the request """
+        try:
+            values = json.loads(request.body) if request.method == "POST" else dict(request.query)
+            if not isinstance(values, dict):
+                raise TypeError("a JSON object is expected")
+            mode = OUTPUT_MODES.get(values.pop("mode", PRETTY.name))
+            if mode is None:
+                raise ValueError(f"the mode is one of {', '.join(OUTPUT_MODES)}")
+            spec = parse_spec(values)
+            hash(spec)  # the key of the cache and of the builds in flight
+        except (ArithmeticError, TypeError, ValueError) as error:  # int(1e400) is an OverflowError
+            raise RequestError(400, f"invalid page spec: {error}") from None
+        if spec.sections < 1 or spec.divs < 0 or spec.sections * max(spec.divs, 1) > MAX_PAGE_DIVS:
+            raise RequestError(400, f"a page has 1+ sections and at most {MAX_PAGE_DIVS} divs or empty sections")
+        return spec, mode.name
+
+    def etag(self, key: PageKey) -> str:
+        """ The page is a function of the key, so the tag is known before the page is built """
+        return f'"{blake2b(repr(key).encode(), digest_size=16, key=self._etag_salt).hexdigest()}"'
+
+    @staticmethod
+    def not_modified(request: Request, etag: str) -> bool:
+        tags = request.headers.get("if-none-match")
+        return tags is not None and (tags.strip() == "*" or etag in (tag.strip() for tag in tags.split(",")))
+
+    async def get_page(self, key: PageKey) -> bytes:
+        """ The cached page, the build in flight for the same key or a new build """
+        page = self.cache.peek(key)
+        if page is not None:
+            return page
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.builds += 1
+            spec, mode = key
+            future = asyncio.get_running_loop().run_in_executor(self.executor, build_page, spec, OUTPUT_MODES[mode])
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._built(key, done))
+        return await asyncio.shield(future)  # a client that goes away does not cancel the build of the others
+
+    def _built(self, key: PageKey, future: asyncio.Future) -> None:
+        del self._in_flight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    async def stream(self, writer: asyncio.StreamWriter, key: PageKey, headers: dict[str, str],
+                     keep_alive: bool) -> None:
+        """ Sends the chunks of the renderer as they are produced, draining the socket between the chunks """
+        loop = asyncio.get_running_loop()
+        spec, mode = key
+        chunks = await loop.run_in_executor(self.executor, iter_page_bytes, spec, OUTPUT_MODES[mode])
+        writer.write(self.head(200, dict(headers, **{"Transfer-Encoding": "chunked"}), keep_alive))
+        while (chunk := await loop.run_in_executor(self.executor, next, chunks, b"")):
+            writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, body: bytes, headers: dict[str, str],
+                   keep_alive: bool) -> None:
+        if status != 304:
+            headers = dict(headers, **{"Content-Length": str(len(body))})
+        writer.write(self.head(status, headers, keep_alive) + body)
+        await writer.drain()
+
+    async def send_error(self, writer: asyncio.StreamWriter, error: RequestError, keep_alive: bool) -> None:
+        self.stats.errors += 1
+        headers = {"Content-Type": "text/plain; charset=utf-8"}
+        if error.status == 405:
+            headers["Allow"] = "GET, POST"
+        await self.send(writer, error.status, f"{error}\n".encode(), headers, keep_alive)
+
+    @staticmethod
+    def head(status: int, headers: dict[str, str], keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}", *(f"{name}: {value}" for name, value in headers.items()),
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}", "", ""]
+        return "\r\n".join(lines).encode("latin-1")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_page(spec: PageSpec, mode: OutputMode) -> bytes:
+    return "".join(iter_page(spec, mode=mode)).encode()
+
+
+def iter_page_bytes(spec: PageSpec, mode: OutputMode) -> Iterator[bytes]:
+    return (chunk.encode() for chunk in iter_page(spec, mode=mode) if chunk)
+
+
+async def serve(host: str, port: int, service: PageService) -> None:
+    server = await service.start(host, port)
+    bound_host, bound_port = server.sockets[0].getsockname()[:2]
+    print(f"serving on http://{bound_host}:{bound_port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m source.service", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=None, help="threads of the build pool")
+    parser.add_argument("--cache-mb", type=int, default=PAGE_CACHE_BYTES // 2 ** 20, help="size of the page cache")
+    parser.add_argument("--stream-divs", type=int, default=STREAM_DIVS,
+                        help="bigger pages are streamed instead of cached")
+    args = parser.parse_args()
+    service = PageService(ThreadPoolExecutor(args.workers, thread_name_prefix="page-service"),
+                          cache_bytes=args.cache_mb * 2 ** 20, stream_divs=args.stream_divs)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cached_property
+from hashlib import blake2b, file_digest
+from threading import RLock
+from typing import Iterator, Optional
+
+from source.html_cache import LRUCache
+from source.html_utils import PageSpec
+from source.template_io import load_text
+
+INDEX_VERSION = 1
+CONTENTS_CACHE_BYTES = 32 * 2 ** 20
+
+
+@dataclass
+class TemplateEntry:
+    name: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+    @cached_property
+    def spec(self) -> Optional[PageSpec]:
+        """ The metadata encoded in the name, e.g. "blue_left_headers_borders(2-6).html" """
+        return PageSpec.from_file_name(self.name)
+
+
+class TemplateIndex:
+    """ A persistent index of the templates directory.
+        The directory is rescanned only when its own mtime changes (a template was added, removed or renamed),
+        and only new or modified files are hashed. A template edited in place does not change the directory mtime,
+        its entry is updated when it is loaded or saved, or by "refresh(force=True)".
+        The loaded contents are kept in a LRU cache.
+        "refresh" may run in a worker thread while the other methods are called from the GUI thread
+    """
+
+    def __init__(self, directory: str = "templates", *, cache_bytes: int = CONTENTS_CACHE_BYTES) -> None:
+        self.directory = directory
+        self.entries: dict[str, TemplateEntry] = dict()
+        self._directory_mtime_ns = 0
+        self._contents: LRUCache[str] = LRUCache(cache_bytes)
+        self._lock = RLock()  # guards the entries and the index file, the scan and the hashing run without it
+        self._read_index()
+
+    @property
+    def index_path(self) -> str:
+        """ The index is kept next to the directory, writing it must not change the directory mtime """
+        parent, directory_name = os.path.split(os.path.abspath(self.directory))
+        return os.path.join(parent, f".{directory_name}.index.json")
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self.entries)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """ Polls the directory, returns True if the set of templates or any of them has changed.
+            A template saved during the scan may be dropped by it, the next poll finds it again:
+            the directory mtime recorded is the one read before the scan
+        """
+        directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+        if directory_mtime_ns == self._directory_mtime_ns and not force:
+            return False
+        with self._lock:
+            known = dict(self.entries)
+        scanned = dict()
+        with os.scandir(self.directory) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.name.endswith(".html") or not dir_entry.is_file():
+                    continue
+                name = dir_entry.name
+                scanned[name] = self._scan_entry(known.get(name), name, dir_entry.stat())
+        with self._lock:
+            changed = scanned != self.entries
+            self.entries = scanned
+            self._directory_mtime_ns = directory_mtime_ns
+            if changed:
+                self._write_index()
+        return changed
+
+    @contextmanager
+    def saving(self, name: str) -> Iterator[str]:
+        """ Yields the path to write the template to and indexes it afterwards without rescanning the directory """
+        known_directory = os.stat(self.directory).st_mtime_ns == self._directory_mtime_ns
+        yield self.path(name)
+        with self._lock:
+            self._update_entry(name, os.stat(self.path(name)))
+            if known_directory:  # nobody else has changed the directory in the meantime
+                self._directory_mtime_ns = os.stat(self.directory).st_mtime_ns
+            self._append_index(self.entries[name])
+
+    def load(self, name: str) -> str:
+        """ Reads the template through the contents cache, a modified file is re-read and re-indexed """
+        with self._lock:
+            if self._update_entry(name, os.stat(self.path(name))):
+                self._append_index(self.entries[name])
+            entry = self.entries[name]
+        return self._contents.get((name, entry.mtime_ns, entry.size), lambda: load_text(self.path(name)))
+
+    def _update_entry(self, name: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(name)
+        new_entry = self._scan_entry(entry, name, stat)
+        self.entries[name] = new_entry
+        return new_entry is not entry
+
+    def _scan_entry(self, entry: Optional[TemplateEntry], name: str, stat: os.stat_result) -> TemplateEntry:
+        """ The entry of an unchanged file is kept, a new or modified file is hashed """
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+        return TemplateEntry(name, stat.st_size, stat.st_mtime_ns, self._hash(self.path(name)))
+
+    @staticmethod
+    def _hash(path: str) -> str:
+        with open(path, "rb") as template:
+            return file_digest(template, lambda: blake2b(digest_size=16)).hexdigest()
+
+    def _read_index(self) -> None:
+        """ The index is a JSON lines journal: a header, then entries and directory mtimes, the last record wins """
+        try:
+            with open(self.index_path, "r") as index:
+                header = json.loads(index.readline())
+                if header.get("version") != INDEX_VERSION:
+                    return
+                self._directory_mtime_ns = header["directory_mtime_ns"]
+                records = json.loads(f"[{','.join(index.read().splitlines())}]")  # one parser call for all lines
+                for record in records:
+                    if isinstance(record, dict):
+                        self._directory_mtime_ns = record["directory_mtime_ns"]
+                    else:
+                        self.entries[record[0]] = TemplateEntry(*record)
+            if len(records) > 2 * len(self.entries) + 64:  # the journal is compacted at startup
+                self._write_index()
+        except (OSError, ValueError, LookupError):
+            self.entries.clear()
+            self._directory_mtime_ns = 0
+
+    def _write_index(self) -> None:
+        """ Rewrites the whole journal, it is done after a rescan only """
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w") as index:
+            index.write(json.dumps(dict(version=INDEX_VERSION, directory_mtime_ns=self._directory_mtime_ns)) + "\n")
+            index.writelines(self._entry_record(entry) for entry in self.entries.values())
+        os.replace(temp_path, self.index_path)
+
+    def _append_index(self, entry: TemplateEntry) -> None:
+        if not os.path.exists(self.index_path):
+            return self._write_index()
+        with open(self.index_path, "a") as index:
+            index.write(self._entry_record(entry))
+            index.write(json.dumps(dict(directory_mtime_ns=self._directory_mtime_ns)) + "\n")
+
+    @staticmethod
+    def _entry_record(entry: TemplateEntry) -> str:
+        return json.dumps((entry.name, entry.size, entry.mtime_ns, entry.digest)) + "\n"
@@ -0,0 +1,67 @@
+import codecs
+import mmap
+import os
+import stat
+from contextlib import contextmanager
+from tempfile import mkstemp
+from typing import IO, Iterable, Iterator, Union
+
+READ_CHUNK_SIZE = 256 * 2 ** 10
+WRITE_BUFFER_SIZE = 4 * 2 ** 20
+NEW_FILE_MODE = 0o644
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """ Maps the file read-only, an empty file can not be mapped and gives empty bytes """
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def load_text(path: str, *, encoding: str = "utf-8") -> str:
+    """ Decodes the mapped file directly, without an intermediate copy of its bytes """
+    with map_file(path) as mapped:
+        return str(mapped, encoding)
+
+
+def iter_text_chunks(path: str, *, chunk_size: int = READ_CHUNK_SIZE, encoding: str = "utf-8") -> Iterator[str]:
+    """ Yields the text of the mapped file by chunks, only the pages being decoded are brought into memory """
+    decoder = codecs.getincrementaldecoder(encoding)()  # a chunk border may split a multibyte character
+    with map_file(path) as mapped:
+        view = memoryview(mapped)
+        try:
+            for start in range(0, len(view), chunk_size):
+                yield decoder.decode(view[start:start + chunk_size])
+        finally:
+            view.release()  # the mapping can not be closed while it is exported
+    yield decoder.decode(b"", final=True)
+
+
+@contextmanager
+def atomic_writer(path: str, mode: str = "w", *, buffer_size: int = WRITE_BUFFER_SIZE,
+                  encoding: str = "utf-8") -> Iterator[IO]:
+    """ Writes into a temporary file next to "path" through a large buffer and renames it over "path" on success,
+        so readers never see a partially written template
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    file_mode = stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else NEW_FILE_MODE
+    descriptor, temp_path = mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with open(descriptor, mode, buffering=buffer_size, encoding=None if "b" in mode else encoding) as output:
+            yield output
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temp_path, file_mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def save_chunks(path: str, chunks: Iterable[str]) -> None:
+    with atomic_writer(path) as output:
+        output.writelines(chunks)
@@ -0,0 +1,83 @@
+from threading import Event
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from source.html_document import GenerationCancelled, HtmlDocument
+from source.html_utils import PageSpec
+from source.preview import PreviewSource
+from source.profiling import PipelineStats
+from source.template_index import TemplateIndex
+
+
+class GenerationSignals(QObject):
+    progress = Signal(int)
+    finished = Signal(object)  # PreviewSource, the page is not converted to a QString on the way
+    stats = Signal(object)  # PipelineStats of the update, emitted before "finished"
+    cancelled = Signal()
+    failed = Signal(str)  # the error message
+
+
+class GenerationTask(QRunnable):
+    """ Updates the document outside of the GUI thread, reporting the progress in percents.
+        A big page is written to a temporary file here as well, so the GUI thread only gets a PreviewSource
+    """
+
+    def __init__(self, document: HtmlDocument, spec: PageSpec) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.document = document
+        self.spec = spec
+        self.signals = GenerationSignals()
+        self._cancelled = Event()
+        self._percent = -1
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        try:
+            self._generate()
+        except GenerationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:  # e.g. an OSError of a full temporary directory, the GUI must get the task back
+            self.signals.failed.emit(f"{type(error).__name__}: {error}")
+
+    def _generate(self) -> None:
+        stats = PipelineStats()
+        with stats.stage("HtmlDocument.update"):
+            self.document.update(self.spec, progress=self._report_progress, cancelled=self._cancelled.is_set)
+        self.signals.progress.emit(100)
+        with stats.stage("PreviewSource"):
+            source = PreviewSource.from_chunks(self.document.iter_html(), self.document.size)
+        stats.bytes = self.document.size
+        self.signals.stats.emit(stats)
+        self.signals.finished.emit(source)
+
+    def _report_progress(self, done: int, total: int) -> None:
+        percent = done * 100 // total
+        if percent != self._percent:  # do not flood the GUI event queue
+            self._percent = percent
+            self.signals.progress.emit(percent)
+
+
+class TemplateScanSignals(QObject):
+    finished = Signal(bool, object)  # whether the templates have changed, the sorted names
+
+
+class TemplateScanTask(QRunnable):
+    """ Refreshes the template index outside of the GUI thread: a cold or stale index stats and hashes
+        every template, which would freeze the window
+    """
+
+    def __init__(self, index: TemplateIndex) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.index = index
+        self.signals = TemplateScanSignals()
+
+    def run(self) -> None:
+        try:
+            changed = self.index.refresh()
+        except OSError:  # the directory is gone or unreadable, the last listing is kept
+            changed = False
+        self.signals.finished.emit(changed, self.index.names())
@@ -0,0 +1,28 @@
+""" The manifest values are converted to the PageSpec and StyleVariant field types """
+import pytest
+
+from source.batch import load_manifest, parse_spec
+from source.html_utils import PageSpec, StyleVariant
+
+
+def test_csv_manifest_with_and_without_variants(tmp_path) -> None:
+    path = tmp_path / "manifest.csv"
+    path.write_text('sections,divs,variants\n'
+                    '2,3,\n'
+                    '3,3\n'
+                    '2,3,"[{""color"": ""red"", ""bordered"": ""false""}, {""bordered"": ""1""}]"\n')
+    assert [spec for _, spec in load_manifest(str(path))] == [
+        PageSpec(sections=2, divs=3),
+        PageSpec(sections=3, divs=3),
+        PageSpec(sections=2, divs=3, variants=(StyleVariant("red"), StyleVariant(bordered=True)))]
+
+
+def test_variant_values_are_converted() -> None:
+    spec = parse_spec({"variants": [{"color": "navy", "alignment": "right", "bordered": "no"}]})
+    assert spec.variants == (StyleVariant("navy", "right", False),)
+
+
+@pytest.mark.parametrize("variants", [[1], ["red"], [{"colour": "red"}], [{"color": ["x"]}], [{"bordered": None}], 5])
+def test_invalid_variants(variants) -> None:
+    with pytest.raises(TypeError):
+        parse_spec({"variants": variants})
@@ -0,0 +1,32 @@
+""" The compiled page shapes must render byte-identically to the tree built by HtmlDirector, in every output mode """
+import random
+
+import pytest
+
+from source.generate import generate_page
+from source.html_render import OUTPUT_MODES, OutputMode
+from source.html_utils import HtmlAdapter, PageSpec
+
+COLORS = ("black", "blue", "red", "green")
+ALIGNMENTS = ("left", "center", "right")
+
+
+def random_specs(count: int, seed: int = 15) -> list[PageSpec]:
+    rng = random.Random(seed)
+    return [PageSpec(sections=rng.randint(1, 12), divs=rng.randint(0, 12), bordered=rng.random() < 0.5,
+                     headers=rng.random() < 0.5, color=rng.choice(COLORS), alignment=rng.choice(ALIGNMENTS))
+            for _ in range(count)]
+
+
+def tree_page(spec: PageSpec, mode: OutputMode, *, compact: bool) -> str:
+    adapter = HtmlAdapter(compact=compact, mode=mode)
+    adapter.build_page(spec)
+    return adapter.get_html()
+
+
+@pytest.mark.parametrize("mode", OUTPUT_MODES.values(), ids=OUTPUT_MODES)
+@pytest.mark.parametrize("spec", random_specs(100) + [PageSpec(), PageSpec(sections=2, divs=6, headers=True)], ids=repr)
+def test_compiled_page_matches_the_tree(spec: PageSpec, mode: OutputMode) -> None:
+    compiled = generate_page(spec, mode=mode)
+    assert compiled == generate_page(spec, compiled=False, mode=mode)
+    assert compiled == tree_page(spec, mode, compact=True)
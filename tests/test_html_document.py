@@ -0,0 +1,58 @@
+""" HtmlDocument.update must leave the same page as a full rebuild of the last spec, cancelled updates included """
+import random
+from dataclasses import replace
+
+import pytest
+
+from source.generate import generate_page
+from source.html_document import GenerationCancelled, HtmlDocument
+from source.html_utils import PageSpec, StyleVariant
+
+VARIANTS = (StyleVariant("red"), StyleVariant("blue", "center", True))
+
+
+def next_spec(rng: random.Random, spec: PageSpec) -> PageSpec:
+    """ Changes two fields, like the widgets do between two clicks on Generate """
+    changes = dict()
+    for field in rng.sample(["sections", "divs", "bordered", "headers", "color", "alignment", "variants"], 2):
+        if field == "sections":
+            changes[field] = rng.randint(1, 10)
+        elif field == "divs":
+            changes[field] = rng.randint(0, 8)
+        elif field in ("bordered", "headers"):
+            changes[field] = not getattr(spec, field)
+        elif field == "color":
+            changes[field] = rng.choice(("black", "blue", "red"))
+        elif field == "alignment":
+            changes[field] = rng.choice(("left", "center", "right"))
+        else:  # the variant pages are not compiled, the document falls back to the tree
+            changes[field] = () if spec.variants or rng.random() < 0.8 else VARIANTS
+    return replace(spec, **changes)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_updates_match_full_rebuilds(seed: int) -> None:
+    rng = random.Random(seed)
+    document = HtmlDocument()
+    spec = PageSpec()
+    for _ in range(30):
+        spec = next_spec(rng, spec)
+        if rng.random() < 0.2:  # an update of another spec cancelled after some sections, if it polls that long
+            polls = iter(range(rng.randint(0, spec.sections), -1, -1))
+            try:
+                document.update(next_spec(rng, spec), cancelled=lambda: next(polls, 0) == 0)
+            except GenerationCancelled:
+                pass
+        document.update(spec)
+        assert document.get_html() == generate_page(spec, compiled=False)
+        assert document.size == len(document.get_html())
+
+
+def test_cancelled_update_keeps_a_consistent_frame() -> None:
+    document = HtmlDocument()
+    blue = PageSpec(sections=3, divs=2, color="blue")
+    document.update(blue)
+    with pytest.raises(GenerationCancelled):
+        document.update(PageSpec(sections=5, divs=2, color="red"), cancelled=lambda: True)
+    document.update(blue)
+    assert document.get_html() == generate_page(blue)
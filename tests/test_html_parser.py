@@ -0,0 +1,82 @@
+""" Round trips through HtmlParser: the rendered layout must come back byte-identically,
+    hand-written markup must keep its content and render to a stable layout
+"""
+import glob
+import os
+
+import pytest
+
+from source.generate import generate_page
+from source.html_parser import HtmlParser
+from source.html_render import HtmlRenderer, MINIFIED
+from source.html_utils import HtmlBuilder, HtmlDirector, PageSpec, StyleVariant
+
+TEMPLATES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                          "templates", "*.html")))
+SPECS = [PageSpec(),
+         PageSpec(sections=3, divs=4, headers=True, bordered=True, color="blue", alignment="center"),
+         PageSpec(sections=2, divs=3, variants=(StyleVariant("red"), StyleVariant("green", "right", True))),
+         PageSpec(sections=2, divs=2, variants=(StyleVariant("red"), StyleVariant("navy")), section_variants=True)]
+
+
+def render(builder: HtmlBuilder) -> str:
+    return HtmlDirector(builder).get_html()
+
+
+@pytest.fixture(params=[False, True], ids=["list", "compact"])
+def parser(request) -> HtmlParser:
+    return HtmlParser(compact=request.param)
+
+
+@pytest.mark.parametrize("path", TEMPLATES, ids=os.path.basename)
+def test_template_round_trip(parser: HtmlParser, path: str) -> None:
+    with open(path, encoding="utf-8") as template:
+        text = template.read()
+    assert render(parser.parse(text)) == text
+    assert render(parser.parse_file(path)) == text
+    assert render(parser.parse_markup((text,))) == text
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=repr)
+def test_generated_round_trip(parser: HtmlParser, spec: PageSpec) -> None:
+    text = generate_page(spec)
+    assert render(parser.parse(text)) == text
+    minified = generate_page(spec, mode=MINIFIED)
+    assert HtmlDirector(parser.parse(text), HtmlRenderer(mode=MINIFIED)).get_html() == minified
+    assert HtmlDirector(parser.parse(minified), HtmlRenderer(mode=MINIFIED)).get_html() == minified
+    if not spec.variants:  # the rules of several variants are adjacent text lines, minified into one
+        assert render(parser.parse(minified)) == text
+
+
+@pytest.mark.parametrize("markup, expected", [
+    ("<div>a</div>\n<div>b</div>", "<div>\n    a\n</div>\n<div>\n    b\n</div>\n"),
+    ("<p>footer</p><h1>main</h1>", "<p>\n    footer\n</p>\n<h1>\n    main\n</h1>\n"),
+    ("<html>\n</html>\n", "<html>\n</html>\n"),
+    ("<html><body><div>br</div></body></html>", "<html>\n    <body>\n        <div>\n            br\n        </div>\n"
+                                                "    </body>\n</html>\n"),
+    ("<title></title>\n<div>x</div>", "<title></title>\n<div>\n    x\n</div>\n"),
+    ("text first\n<hr>\n<p>then a paragraph</p>", "text first\n<hr>\n<p>\n    then a paragraph\n</p>\n"),
+    ("<p>one <b>two</b> three</p>", "<p>\n    one\n    <b>\n        two\n    </b>\n    three\n</p>\n"),
+    ("<p>&amp; &lt;tag&gt; &#169; &nbsp;x</p>", "<p>\n    &amp; &lt;tag&gt; &#169; &nbsp;x\n</p>\n"),
+    ("<!doctype html>\n<html><head><meta charset=\"utf-8\"></head></html>",
+     "<!DOCTYPE html>\n<html>\n    <head>\n        <meta charset=\"utf-8\">\n    </head>\n</html>\n"),
+    ("", ""),
+])
+def test_hand_written_markup(parser: HtmlParser, markup: str, expected: str) -> None:
+    rendered = render(parser.parse(markup))
+    assert rendered == expected
+    assert render(parser.parse(rendered)) == rendered  # the rendered layout goes through the line tokenizer
+
+
+def test_content_is_never_a_tag(parser: HtmlParser) -> None:
+    words = ["a", "b", "p", "main", "footer", "html", "div", "br", "!DOCTYPE"]
+    markup = "".join(f"<div>{word}</div>" for word in words)
+    rendered = render(parser.parse(markup))
+    assert rendered == "".join(f"<div>\n    {word}\n</div>\n" for word in words)
+    assert "<a>" not in rendered and "<main>" not in rendered
+
+
+def test_parse_file_is_utf8(parser: HtmlParser, tmp_path) -> None:
+    path = tmp_path / "page.html"
+    path.write_text("<p>\n    привет, ✓\n</p>\n", encoding="utf-8")
+    assert render(parser.parse_file(str(path))) == "<p>\n    привет, ✓\n</p>\n"
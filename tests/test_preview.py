@@ -0,0 +1,24 @@
+""" The temporary files of PreviewSource are written and read back as UTF-8 whatever the locale """
+from source.preview import LAZY_THRESHOLD, PreviewSource
+
+TEXT = "<p>\n    привет, ✓ — ü\n</p>\n"
+
+
+def test_to_file_is_utf8() -> None:
+    source = PreviewSource.from_text(TEXT)
+    try:
+        with open(source.to_file(), encoding="utf-8") as written:
+            assert written.read() == TEXT
+        assert "".join(PreviewSource(path=source.path).iter_chunks(chunk_size=7)) == TEXT
+    finally:
+        source.close()
+
+
+def test_big_document_from_chunks() -> None:
+    chunks = [TEXT] * (LAZY_THRESHOLD // len(TEXT.encode()) + 1)
+    source = PreviewSource.from_chunks(chunks, LAZY_THRESHOLD + 1)
+    try:
+        assert source.is_lazy
+        assert "".join(source.iter_chunks()) == "".join(chunks)
+    finally:
+        source.close()
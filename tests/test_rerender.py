@@ -0,0 +1,30 @@
+""" The tags are immutable, so one built tree renders identically any number of times and from parallel threads """
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from source.html_utils import HtmlAdapter, Style
+
+RENDERS = 1_000
+THREADS = 8
+
+
+@pytest.fixture(params=[False, True], ids=["list", "compact"])
+def adapter(request) -> HtmlAdapter:
+    adapter = HtmlAdapter(compact=request.param)
+    adapter.director.build_tree(sections_num=5, divs_num=8, headers=True,
+                                div_style=Style("container", ".container {color: red; }"))
+    return adapter
+
+
+def test_sequential_renders_are_identical(adapter: HtmlAdapter) -> None:
+    expected = adapter.get_html()
+    for _ in range(RENDERS):
+        assert adapter.get_html() == expected
+
+
+def test_parallel_renders_are_identical(adapter: HtmlAdapter) -> None:
+    expected = adapter.get_html()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        outputs = list(pool.map(lambda _: adapter.get_html(), range(RENDERS)))
+    assert outputs == [expected] * RENDERS
@@ -0,0 +1,55 @@
+""" The page service answers a 400 to any invalid request instead of building or crashing """
+import asyncio
+import json
+
+import pytest
+
+from source.service import MAX_PAGE_DIVS, PageService, Request, RequestError, read_request
+
+
+def post(values: dict) -> Request:
+    return Request("POST", "/page", dict(), dict(), json.dumps(values).encode())
+
+
+@pytest.mark.parametrize("values", [
+    {"sections": 0},
+    {"divs": -1},
+    {"sections": MAX_PAGE_DIVS + 1, "divs": 0},
+    {"sections": 100_000_000_000, "divs": 0},
+    {"sections": MAX_PAGE_DIVS, "divs": 2},
+])
+def test_page_size_is_bounded(values: dict) -> None:
+    with pytest.raises(RequestError) as error:
+        PageService.page_key(post(values))
+    assert error.value.status == 400
+
+
+def test_empty_sections_within_bounds() -> None:
+    spec, mode = PageService.page_key(post({"sections": MAX_PAGE_DIVS, "divs": 0, "mode": "compact"}))
+    assert (spec.sections, spec.divs, mode) == (MAX_PAGE_DIVS, 0, "compact")
+
+
+@pytest.mark.parametrize("values", [
+    {"variants": [{"color": ["x"]}]},
+    {"variants": [["red"]]},
+    {"variants": "red"},
+    {"mode": ["pretty"]},
+    {"sections": 1e400},
+])
+def test_invalid_values(values: dict) -> None:
+    with pytest.raises(RequestError) as error:
+        PageService.page_key(post(values))
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("length", ["-1", "x", "1e3"])
+def test_invalid_content_length(length: str) -> None:
+    async def read() -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /page HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+        reader.feed_eof()
+        await read_request(reader)
+
+    with pytest.raises(RequestError) as error:
+        asyncio.run(read())
+    assert error.value.status == 400
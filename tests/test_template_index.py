@@ -0,0 +1,23 @@
+""" The journal of TemplateIndex must give a new index the same entries as the one that wrote it """
+import os
+
+from source.template_index import TemplateIndex
+
+
+def test_in_place_edit_is_journaled_by_load(tmp_path) -> None:
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    path = directory / "page.html"
+    path.write_text("<p>\n    one\n</p>\n")
+    index = TemplateIndex(str(directory))
+    index.refresh()
+    directory_mtime_ns = os.stat(directory).st_mtime_ns
+
+    path.write_text("<p>\n    edited in place\n</p>\n")
+    assert os.stat(directory).st_mtime_ns == directory_mtime_ns
+    assert not index.refresh()  # the directory mtime is unchanged, the edit is not seen
+    assert index.load("page.html") == "<p>\n    edited in place\n</p>\n"
+    assert index.entries["page.html"].size == path.stat().st_size
+
+    reloaded = TemplateIndex(str(directory))
+    assert reloaded.entries == index.entries